@@ -1,13 +1,18 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from dotenv import load_dotenv
+import contextvars
+import hashlib
+import itertools
 import os
-from concurrent.futures import ThreadPoolExecutor
+import httpx
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from urllib.parse import urlparse, parse_qs
-from langchain_groq import ChatGroq
-from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from pydantic import BaseModel, Field
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
@@ -21,21 +26,52 @@ from youtube_transcript_api import (
     InvalidVideoId,
 )
 import validators
-import yt_dlp
 import json
 
 from flask_cors import CORS
-from googlesearch import search
-import requests
-from bs4 import BeautifulSoup
+from cache_store import SpillStore, SqliteCache, content_key
+from hedged_fetch import AllSourcesFailed, HedgedFetcher
+from jobs import JobManager, JobQueueFull
+from language_detect import detect_language
+from llm_scheduler import LLMScheduler, PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_PIPELINE, estimate_tokens
+from passage_index import PassageIndex
+from precompress import PRECOMPRESS_LEVELS, PRECOMPRESS_VERSION, CaptionCleaner, build_report, precompress
+from metrics import current_trace, registry, request_trace, run_in_context
 import re
 
+# Language detection runs locally (script + common-word profile, plus the
+# caption track's language when known); only results below this confidence
+# fall back to asking the LLM.
+LOCAL_LANGUAGE_MIN_CONFIDENCE = 0.8
+LANGUAGE_SAMPLE_CHARS = 3000
+
 # Hard ceiling on transcript size — this is the "truly out of bounds" cutoff, not a
 # quality trade-off. ~300k characters is roughly a 5-6 hour continuous-speech video,
 # comfortably covering long lectures/podcasts. Beyond this we fail fast with a clear
 # error instead of grinding through hours of sequential/parallel LLM calls.
 MAX_TRANSCRIPT_CHARS = 300000
 
+# Long-form mode ("longForm": true on /summarize-video) lifts that ceiling for
+# conference recordings and multi-day streams: chunk summaries and reduce
+# levels are spilled to a SpillStore and processed LONGFORM_WINDOW_CHUNKS at a
+# time, so memory stays flat however long the transcript is. The transcript
+# itself is never assembled (and so isn't returned or cached).
+LONGFORM_MAX_TRANSCRIPT_CHARS = int(os.environ.get("LONGFORM_MAX_TRANSCRIPT_CHARS", 20000000))
+LONGFORM_WINDOW_CHUNKS = 32
+
+# Caption transcripts are shrunk locally before the LLM sees them (see
+# precompress.py). By default ("clean") caption noise is only cleaned out, as
+# segments stream in. "balanced" and "aggressive" opt into extraction: a
+# transcript still over PRECOMPRESS_BUDGET_CHARS has its best-ranked
+# sentences extracted down to the budget, keeping at least the share the
+# level allows. Extraction needs the whole text, so with it on, fresh
+# transcripts it may apply to aren't summarized while they stream in;
+# long-form transcripts are only ever cleaned. "off" skips the stage.
+PRECOMPRESS_LEVEL = os.environ.get("PRECOMPRESS_LEVEL", "clean")
+PRECOMPRESS_BUDGET_CHARS = int(os.environ.get("PRECOMPRESS_BUDGET_CHARS", 60000))
+if PRECOMPRESS_LEVEL not in PRECOMPRESS_LEVELS:
+    raise ValueError(f"PRECOMPRESS_LEVEL must be one of {', '.join(PRECOMPRESS_LEVELS)}, not {PRECOMPRESS_LEVEL!r}")
+
 # Once the running summary shrinks below this, it's small enough to safely hand to
 # the final HTML-formatting LLM call in one shot.
 REDUCE_TARGET_CHARS = 6000
@@ -46,12 +82,72 @@ MAX_REDUCE_ROUNDS = 5
 # was silently breaking every LLM call in the video/QA/fake-news pipelines.
 GROQ_MODEL = "llama-3.3-70b-versatile"
 
+# Bump the matching version whenever a prompt's wording changes, so cached
+# outputs produced under the old wording stop being served.
+DETECT_PROMPT_VERSION = 1
+TRANSLATE_PROMPT_VERSION = 1
+MAP_PROMPT_VERSION = 1
+MAP_BATCH_PROMPT_VERSION = 1
+MAP_TRANSLATE_PROMPT_VERSION = 1
+MAP_TRANSLATE_BATCH_PROMPT_VERSION = 1
+REDUCE_PROMPT_VERSION = 1
+FORMAT_PROMPT_VERSION = 1
+CLAIMS_PROMPT_VERSION = 1
+VERIFY_PROMPT_VERSION = 1
+# Bump whenever _split_text's sizing rules change, since chunk boundaries
+# determine every downstream LLM output.
+CHUNKING_VERSION = 3
+
+# Finished pipeline results, keyed by a hash of the normalized transcript plus
+# everything that can change the output (model, prompt versions). A viral
+# video submitted by hundreds of users in the same hour only pays for the LLM
+# chain once.
+summary_cache = SqliteCache("summaries", max_entries=5000, ttl_seconds=7 * 24 * 3600)
+
+# Per-chunk LLM outputs (translations and map-phase partial summaries), keyed
+# by a hash of the chunk text plus prompt/model. Re-uploads, trimmed clips and
+# the same video coming through a different transcript source share most of
+# their chunks, so only the chunks that actually changed go back to Groq.
+chunk_cache = SqliteCache("chunks", max_entries=200000, ttl_seconds=30 * 24 * 3600)
+
+# Fetched transcripts keyed by video ID, so repeat requests for the same video
+# never go back to YouTube (repeated scraping is what gets the server
+# RequestBlocked/IpBlocked). "Captions disabled"/"no transcript" outcomes are
+# cached too, but only briefly, since uploaders can add captions later.
+transcript_cache = SqliteCache("transcripts", max_entries=20000, ttl_seconds=24 * 3600)
+TRANSCRIPT_NEGATIVE_TTL_SECONDS = 3600
+
+# Job mode for /summarize and /summarize-video: a near-limit transcript can
+# take minutes of map/reduce rounds, longer than the proxy in front of us will
+# hold a request open. Jobs run on this small fixed pool; submissions beyond
+# the queue limit are refused with a 429 instead of piling up unbounded.
+summary_jobs = JobManager(max_workers=4, max_pending=100, ttl_seconds=3600)
+
 class Summary(BaseModel):
     summary: str = Field(description="The generated summary")
 
+class IndexedSummary(BaseModel):
+    index: int = Field(description="The number of the chunk this summary belongs to")
+    summary: str = Field(description="The generated summary of that chunk")
+
+class SummaryBatch(BaseModel):
+    summaries: list[IndexedSummary] = Field(description="Exactly one summary per input chunk, in chunk order")
+
 class QuestionAnswer(BaseModel):
     answer: str = Field(description="The answer to the question")
 
+class CitedAnswer(BaseModel):
+    answer: str = Field(description="The answer to the question")
+    citations: list[int] = Field(description="Numbers of the transcript passages the answer relies on")
+
+class ClaimList(BaseModel):
+    claims: list[str] = Field(description="Self-contained, checkable factual claims made by the text")
+
+class ClaimVerdict(BaseModel):
+    verdict: str = Field(description='One of "supported", "false", "disputed" or "unverifiable"')
+    confidence: float = Field(description="Confidence in the verdict, from 0 to 1")
+    reason: str = Field(description="One or two sentences explaining the verdict")
+
 class FakeNewsAnalysis(BaseModel):
     is_fake: bool = Field(description="Whether the news is likely fake")
     confidence: float = Field(description="Confidence score of the analysis")
@@ -59,30 +155,451 @@ class FakeNewsAnalysis(BaseModel):
     suggestions: list[str] = Field(description="Suggestions for fact-checking")
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": [
+CORS_ORIGINS = [
     "http://localhost:8080",
     "http://localhost:8081",
     "https://brieflensnews.onrender.com"
-]}})
+]
+CORS(app, resources={r"/*": {"origins": CORS_ORIGINS}})
+
+
+# One long-lived ChatGroq per temperature, all sharing a single keep-alive
+# HTTP connection pool, plus each prompt|llm|parser chain compiled once on
+# first use. Building these per request meant a new connection pool and TLS
+# handshake on every call, and re-rendering the same format instructions.
+# langchain and the Groq SDK are imported by the first chain built rather
+# than at startup, which they used to slow by about a second per cold start.
+# The async client serves ainvoke() calls from the ASGI app (asgi.py) and is
+# bound to that server's single event loop.
+GROQ_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120)
+GROQ_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+_groq_http_client = httpx.Client(limits=GROQ_HTTP_LIMITS, timeout=GROQ_HTTP_TIMEOUT)
+_groq_async_http_client = httpx.AsyncClient(limits=GROQ_HTTP_LIMITS, timeout=GROQ_HTTP_TIMEOUT)
+_llm_clients = {}
+_compiled_chains = {}
+_llm_registry_lock = threading.Lock()
+
+_CHAIN_BUILDERS = {
+    "detect": lambda: LANGUAGE_DETECTION_PROMPT.chain(0.3),
+    "translate": lambda: TRANSLATION_PROMPT.chain(0.3),
+    "map": lambda: MAP_PROMPT.chain(0.3),
+    "map_batch": lambda: MAP_BATCH_PROMPT.chain(0.3),
+    "map_translate": lambda: MAP_TRANSLATE_PROMPT.chain(0.3),
+    "map_translate_batch": lambda: MAP_TRANSLATE_BATCH_PROMPT.chain(0.3),
+    "reduce": lambda: REDUCE_PROMPT.chain(0.3),
+    "format": lambda: FORMAT_PROMPT.chain(0.3),
+    "answer": lambda: ANSWER_PROMPT.chain(0.9),
+    "answer_passages": lambda: ANSWER_PASSAGES_PROMPT.chain(0.3),
+    "extract_claims": lambda: CLAIMS_PROMPT.chain(0.3),
+    "verify_claim": lambda: VERIFY_PROMPT.chain(0.3),
+}
+
+
+def get_llm(temperature):
+    """Process-wide ChatGroq client for GROQ_MODEL at the given temperature."""
+    llm = _llm_clients.get(temperature)
+    if llm is None:
+        with _llm_registry_lock:
+            llm = _llm_clients.get(temperature)
+            if llm is None:
+                from langchain_groq import ChatGroq
+                # Retries are owned by llm_scheduler, which backs off globally on 429s.
+                llm = ChatGroq(
+                    model=GROQ_MODEL, temperature=temperature, max_retries=0,
+                    http_client=_groq_http_client, http_async_client=_groq_async_http_client,
+                )
+                _llm_clients[temperature] = llm
+    return llm
+
+
+class _Prompt:
+    """A prompt's template (or chat messages, for a chat prompt) and the
+    pydantic model its JSON answer is parsed into, if any. chain() builds the
+    langchain prompt | llm | parser pipeline from it."""
+
+    def __init__(self, template=None, input_variables=(), output_model=None, messages=None):
+        self.template = template
+        self.input_variables = list(input_variables)
+        self.output_model = output_model
+        self.messages = messages
+
+    def chain(self, temperature):
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+        parser = JsonOutputParser(pydantic_object=self.output_model) if self.output_model is not None else None
+        if self.messages is not None:
+            prompt = ChatPromptTemplate.from_messages(self.messages)
+        else:
+            partial_variables = {"format_instructions": parser.get_format_instructions()} if parser is not None else {}
+            prompt = PromptTemplate(template=self.template, input_variables=self.input_variables, partial_variables=partial_variables)
+        chain = prompt | get_llm(temperature)
+        return chain | parser if parser is not None else chain
+
+
+def get_chain(name):
+    """Process-wide compiled chain registered in _CHAIN_BUILDERS."""
+    chain = _compiled_chains.get(name)
+    if chain is None:
+        built = _CHAIN_BUILDERS[name]()
+        with _llm_registry_lock:
+            chain = _compiled_chains.setdefault(name, built)
+    return chain
+
+
+# Every Groq call in the process goes through one scheduler (concurrency cap,
+# requests/tokens-per-minute budgets, priority order, 429 backoff), and all
+# chunk fan-out runs on one shared executor. Per-request pools used to turn
+# 20 concurrent users into 120+ simultaneous Groq calls, trip the provider's
+# rate limits and silently degrade chunks to raw text.
+GROQ_MAX_CONCURRENCY = int(os.environ.get("GROQ_MAX_CONCURRENCY", 16))
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 1000))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", 300000))
+# Rough allowance for the prompt template and the completion on top of the
+# variable inputs, when charging a call against the tokens-per-minute budget.
+LLM_CALL_OVERHEAD_TOKENS = 600
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=GROQ_MAX_CONCURRENCY,
+    requests_per_minute=GROQ_REQUESTS_PER_MINUTE,
+    tokens_per_minute=GROQ_TOKENS_PER_MINUTE,
+)
+llm_executor = ThreadPoolExecutor(max_workers=GROQ_MAX_CONCURRENCY * 2, thread_name_prefix="llm")
+
+
+def _submit(fn, *args):
+    """llm_executor.submit() that keeps the caller's request trace."""
+    return run_in_context(llm_executor, fn, *args)
+
+
+# Instrumentation, served in Prometheus format from /metrics. Stage spans wrap
+# each pipeline step (transcript fetch, yt-dlp fallback, detect, translate,
+# map/reduce, format); LLM spans wrap each individual Groq call. When a
+# request opted into a timing breakdown, the same numbers are accumulated on
+# its RequestTrace as well.
+STAGE_SECONDS = registry.histogram("brieflens_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"])
+LLM_CALL_SECONDS = registry.histogram("brieflens_llm_call_duration_seconds", "Duration of individual LLM calls, including scheduler wait and retries", ["chain", "outcome"])
+LLM_TOKENS = registry.counter("brieflens_llm_tokens_total", "Estimated LLM tokens by chain and direction", ["chain", "direction"])
+LLM_RETRIES = registry.counter("brieflens_llm_retries_total", "LLM calls retried after a provider rate limit", ["chain"])
+LLM_FALLBACKS = registry.counter("brieflens_llm_fallbacks_total", "Chunks or merges that fell back to raw/unmerged text after an LLM failure", ["stage"])
+PRECOMPRESS_CHARS_REMOVED = registry.counter("brieflens_precompress_chars_removed_total", "Transcript characters removed before any LLM call, by step", ["step"])
+LANGUAGE_DETECTIONS = registry.counter("brieflens_language_detections_total", "Language detections by method (script, words, caption, llm)", ["method"])
+HTTP_SECONDS = registry.histogram("brieflens_http_request_duration_seconds", "HTTP request duration by endpoint and status", ["endpoint", "method", "status"])
+
+
+@contextmanager
+def span(stage):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = current_trace()
+        if trace is not None:
+            trace.add_stage(stage, elapsed)
+
+
+def _record_fallback(stage):
+    LLM_FALLBACKS.inc(stage=stage)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_llm(fallbacks=1)
+
+
+def _output_tokens(result):
+    if hasattr(result, "content"):
+        return estimate_tokens(result.content)
+    return estimate_tokens(json.dumps(result)) if result is not None else 0
+
+
+def _estimate_call_tokens(inputs):
+    return estimate_tokens(" ".join(str(v) for v in inputs.values())) + LLM_CALL_OVERHEAD_TOKENS
+
 
+class _CallRecord:
+    """Duration, estimated tokens and retries of one scheduled LLM call,
+    recorded under the chain's name when the call ends."""
 
-def _split_text(text, chunk_size=1000, chunk_overlap=200):
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len
+    def __init__(self, name, inputs):
+        self.name = name
+        self.input_tokens = _estimate_call_tokens(inputs)
+        self.trace = current_trace()
+        self.retries = 0
+        self.outcome = "error"
+        self.output_tokens = 0
+        self.start = time.monotonic()
+
+    def on_retry(self):
+        self.retries += 1
+        LLM_RETRIES.inc(chain=self.name)
+
+    def succeeded(self, result):
+        self.outcome = "ok"
+        self.output_tokens = _output_tokens(result)
+        return result
+
+    def finish(self):
+        elapsed = time.monotonic() - self.start
+        LLM_CALL_SECONDS.observe(elapsed, chain=self.name, outcome=self.outcome)
+        LLM_TOKENS.inc(self.input_tokens, chain=self.name, direction="input")
+        LLM_TOKENS.inc(self.output_tokens, chain=self.name, direction="output")
+        if self.trace is not None:
+            self.trace.add_llm(calls=1, seconds=elapsed, inputTokens=self.input_tokens, outputTokens=self.output_tokens, retries=self.retries)
+
+
+class StreamCancelled(Exception):
+    """The client of a streaming request went away; raised to stop the
+    request's pipeline instead of paying for LLM calls nobody will read."""
+
+
+# Set (to a threading.Event) for the run of a streaming request's job, and
+# carried onto llm_executor threads along with the request trace.
+_stream_cancelled = contextvars.ContextVar("stream_cancelled", default=None)
+
+
+def _check_stream_cancelled():
+    cancelled = _stream_cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise StreamCancelled()
+
+
+def _scheduled_call(name, inputs, priority, fn):
+    """Runs fn() through llm_scheduler and records the call's duration,
+    estimated tokens and retries under the chain's name. Raises
+    StreamCancelled instead once the request's stream has been closed."""
+    _check_stream_cancelled()
+    record = _CallRecord(name, inputs)
+    try:
+        return record.succeeded(llm_scheduler.call(fn, record.input_tokens, priority, record.on_retry))
+    finally:
+        record.finish()
+
+
+async def _ascheduled_call(name, inputs, priority, fn):
+    """_scheduled_call for a coroutine function fn."""
+    record = _CallRecord(name, inputs)
+    try:
+        return record.succeeded(await llm_scheduler.acall(fn, record.input_tokens, priority, record.on_retry))
+    finally:
+        record.finish()
+
+
+def run_chain(name, inputs, priority=PRIORITY_PIPELINE):
+    """get_chain(name).invoke(inputs) under llm_scheduler admission control."""
+    chain = get_chain(name)
+    return _scheduled_call(name, inputs, priority, lambda: chain.invoke(inputs))
+
+
+async def arun_chain(name, inputs, priority=PRIORITY_PIPELINE):
+    """run_chain() for the event loop, through the chain's ainvoke()."""
+    chain = get_chain(name)
+    return await _ascheduled_call(name, inputs, priority, lambda: chain.ainvoke(inputs))
+
+
+def stream_chain(name, inputs, on_item, priority=PRIORITY_PIPELINE):
+    """Streams get_chain(name)'s output under llm_scheduler admission
+    control, passing each streamed item to on_item. The slot is held until
+    the stream ends."""
+    chain = get_chain(name)
+
+    def consume():
+        last = None
+        for item in chain.stream(inputs):
+            on_item(item)
+            last = item
+        return last
+    _scheduled_call(name, inputs, priority, consume)
+
+
+# Chunks are measured in tokens, not characters. The old fixed 1000-char /
+# 200-overlap split turned a 300k-char transcript into ~375 tiny calls per map
+# round, dominated by fixed prompt overhead, with 20% of all tokens spent on
+# overlap. Map chunk size now scales with the transcript (aiming for about
+# MAP_TARGET_CHUNKS chunks) within a window where llama-3.3-70b summaries
+# stay faithful. The size depends on the text alone, so a transcript always
+# splits into the same chunks and hits the same chunk_cache entries; load is
+# left to llm_scheduler to throttle.
+MAP_CHUNK_TOKENS_MIN = 1000
+MAP_CHUNK_TOKENS_MAX = 6000
+MAP_TARGET_CHUNKS = 12
+# Translation output is as long as its input, so translate chunks are capped
+# well below the model's completion limit.
+TRANSLATE_CHUNK_TOKENS = 1500
+# Sentence boundaries first: transcripts are usually one long line, and the
+# splitter's default separators would otherwise cut mid-sentence on spaces.
+_SPLIT_SEPARATORS = ["\n\n", "\n", ". ", "? ", "! ", "। ", "。", ", ", " ", ""]
+_SENTENCE_END_RE = re.compile(r"[.!?।。]")
+
+
+def _choose_chunk_tokens(total_tokens):
+    return max(MAP_CHUNK_TOKENS_MIN, min(MAP_CHUNK_TOKENS_MAX, total_tokens // MAP_TARGET_CHUNKS))
+
+
+def _choose_overlap_tokens(text, chunk_tokens):
+    """Punctuated text splits cleanly on sentence boundaries and needs only a
+    sliver of overlap; unpunctuated auto-captions get cut mid-thought, so
+    they keep more context across the seam."""
+    sample = text[:20000]
+    sentence_ends_per_1k = len(_SENTENCE_END_RE.findall(sample)) * 1000 / max(1, len(sample))
+    return chunk_tokens * (3 if sentence_ends_per_1k >= 4 else 8) // 100
+
+
+def _split_text(text, chunk_tokens=None, overlap_tokens=None):
+    """Token-measured split. With no explicit sizes, chunk size and overlap
+    are chosen from the text itself (see _choose_chunk_tokens)."""
+    if chunk_tokens is None:
+        chunk_tokens = _choose_chunk_tokens(estimate_tokens(text))
+    if overlap_tokens is None:
+        overlap_tokens = _choose_overlap_tokens(text, chunk_tokens)
+    from langchain_core.documents import Document
+    return _text_splitter(chunk_tokens, overlap_tokens).split_documents([Document(page_content=text)])
+
+
+def _text_splitter(chunk_tokens, overlap_tokens):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        separators=_SPLIT_SEPARATORS,
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=estimate_tokens
     )
-    return splitter.split_documents([Document(page_content=text)])
 
 
-def _translate_to_english(text, llm, source_language):
-    """Translates arbitrary-language text to English, chunk-by-chunk and in
-    parallel. Naming the detected source language in the prompt (rather than
-    leaving the model to infer it) measurably improves translation quality.
-    Chunks that fail to translate fall back to their original text rather than
-    being dropped, so a single bad chunk can't sink the whole transcript."""
-    translation_prompt = PromptTemplate(
-        template="""
+# Streaming ingestion doesn't know a transcript's length up front, so instead
+# of sizing every chunk from the total it starts at MAP_CHUNK_TOKENS_MIN (the
+# first map calls go out early) and doubles the size every
+# STREAM_CHUNKS_PER_SIZE chunks up to MAP_CHUNK_TOKENS_MAX, which keeps long
+# transcripts near _split_text's chunk count. Each chunk is cut from a window
+# of STREAM_WINDOW_CHARS_PER_TOKEN characters per chunk token at the head of
+# the buffer: roughly two chunks of ordinary text, enough for the splitter
+# to find a good boundary.
+STREAM_CHUNKS_PER_SIZE = 4
+STREAM_WINDOW_CHARS_PER_TOKEN = 8
+
+
+class _StreamingSplitter:
+    """Incremental counterpart of _split_text: feed() transcript segments as
+    they arrive and get back whichever map chunks are complete; finish()
+    returns the rest. A chunk is only cut once a full window is buffered,
+    always from the buffer's head, so chunk boundaries depend on the text
+    alone, not on how the source happened to segment it."""
+
+    def __init__(self):
+        self.parts = []
+        self.buffered_chars = 0
+        self.count = 0
+        self.overlap_percent = None
+
+    def snapshot(self):
+        """JSON-serializable state, for restore() to go on cutting the same
+        chunks from later text."""
+        return {
+            "buffer": "".join(self.parts),
+            "count": self.count,
+            "overlapPercent": self.overlap_percent,
+        }
+
+    @classmethod
+    def restore(cls, snapshot):
+        splitter = cls()
+        splitter.parts = [snapshot["buffer"]] if snapshot["buffer"] else []
+        splitter.buffered_chars = len(snapshot["buffer"])
+        splitter.count = snapshot["count"]
+        splitter.overlap_percent = snapshot["overlapPercent"]
+        return splitter
+
+    def _chunk_tokens(self):
+        return min(MAP_CHUNK_TOKENS_MAX, MAP_CHUNK_TOKENS_MIN * 2 ** (self.count // STREAM_CHUNKS_PER_SIZE))
+
+    def _window_chars(self):
+        return self._chunk_tokens() * STREAM_WINDOW_CHARS_PER_TOKEN
+
+    def feed(self, segment):
+        self.parts.append(segment)
+        self.buffered_chars += len(segment)
+        docs = []
+        while self.buffered_chars >= self._window_chars():
+            docs.extend(self._cut())
+        return docs
+
+    def finish(self):
+        docs = []
+        while self.buffered_chars:
+            docs.extend(self._cut())
+        return docs
+
+    def _cut(self):
+        buffer = "".join(self.parts)
+        chunk_tokens = self._chunk_tokens()
+        window = buffer[:self._window_chars()]
+        if self.overlap_percent is None:
+            self.overlap_percent = _choose_overlap_tokens(window, 100)
+        pieces = _text_splitter(chunk_tokens, chunk_tokens * self.overlap_percent // 100).split_text(window)
+        # The buffer moves on to where the window's second piece starts,
+        # which already includes the overlap with the first. Overlap is a few
+        # percent of a chunk, so the search starts halfway into the first
+        # piece to skip earlier repeats of the same text.
+        advance = len(window)
+        if len(pieces) > 1:
+            found = window.find(pieces[1], len(pieces[0]) // 2)
+            if found > 0:
+                advance = found
+        rest = buffer[advance:]
+        self.parts = [rest] if rest else []
+        self.buffered_chars = len(rest)
+        if not pieces:
+            return []
+        from langchain_core.documents import Document
+        self.count += 1
+        return [Document(page_content=pieces[0])]
+
+
+def _no_progress(stage, **fields):
+    pass
+
+
+class _ChunkProgress:
+    """Thread-safe callback that reports one more finished chunk of the
+    current stage to progress(). total is None while the chunk count isn't
+    known yet (streaming ingestion) until set_total() fills it in."""
+
+    def __init__(self, progress, stage, total=None):
+        self.progress = progress
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.lock = threading.Lock()
+        progress(stage, chunksDone=0, chunksTotal=total)
+
+    def __call__(self):
+        with self.lock:
+            self.done += 1
+            self.progress(self.stage, chunksDone=self.done, chunksTotal=self.total)
+
+    def set_total(self, total):
+        with self.lock:
+            self.total = total
+            self.progress(self.stage, chunksDone=self.done, chunksTotal=total)
+
+
+def _new_chunk_stats():
+    return {"hits": 0, "misses": 0}
+
+
+def _record_chunk_hits(stats, hit_flags):
+    if stats is None:
+        return
+    for hit in hit_flags:
+        stats["hits" if hit else "misses"] += 1
+
+
+def _chunk_stats_summary(stats):
+    lookups = stats["hits"] + stats["misses"]
+    return {**stats, "hitRatio": round(stats["hits"] / lookups, 4) if lookups else 0.0}
+
+
+TRANSLATION_PROMPT = _Prompt(
+    template="""
         Translate the following {language} text to English. Maintain the
         original meaning and context. Return only the English translation
         with no extra commentary.
@@ -90,53 +607,382 @@ def _translate_to_english(text, llm, source_language):
         {language} text:
         {text}
         """,
-        input_variables=["text", "language"]
-    )
-    translation_chain = translation_prompt | llm
+    input_variables=["text", "language"]
+)
+
+
+def _translate_chunk_key(doc, source_language):
+    return content_key("translate", GROQ_MODEL, TRANSLATE_PROMPT_VERSION, source_language, doc.page_content)
+
 
+def _translate_to_english(text, source_language, chunk_stats=None, progress=_no_progress):
+    """Translates arbitrary-language text to English, chunk-by-chunk and in
+    parallel. Naming the detected source language in the prompt (rather than
+    leaving the model to infer it) measurably improves translation quality.
+    Chunks that fail to translate fall back to their original text rather than
+    being dropped, so a single bad chunk can't sink the whole transcript.
+    Successful translations are memoized per chunk in chunk_cache; fallbacks
+    are never cached so a transient failure is retried next time."""
     def translate_chunk(doc):
+        key = _translate_chunk_key(doc, source_language)
+        cached = chunk_cache.get(key)
+        if cached is not None:
+            tick()
+            return cached, True
+        try:
+            translated = run_chain("translate", {"text": doc.page_content, "language": source_language}, PRIORITY_BULK).content
+        except Exception:
+            _record_fallback("translate")
+            tick()
+            return doc.page_content, False
+        chunk_cache.set(key, translated)
+        tick()
+        return translated, False
+
+    docs = _split_text(text, chunk_tokens=TRANSLATE_CHUNK_TOKENS, overlap_tokens=0)
+    tick = _ChunkProgress(progress, "translate", len(docs))
+    results = [future.result() for future in [_submit(translate_chunk, doc) for doc in docs]]
+    _record_chunk_hits(chunk_stats, (hit for _, hit in results))
+    return " ".join(part for part, _ in results)
+
+
+# Non-English transcripts at least this long skip the separate translation
+# pass and are summarized straight into English chunk by chunk, roughly
+# halving their LLM calls. Below it the full translation is only a call or
+# two and is kept.
+FUSED_TRANSLATION_MIN_TOKENS = 3000
+
+
+# Small chunks (reduce rounds, short transcripts) are packed several to a
+# request so the prompt and format instructions are paid once per batch
+# rather than once per chunk.
+MAP_BATCH_MAX_TOKENS = 8000
+MAP_BATCH_MAX_CHUNKS = 8
+
+
+def _map_chunk_key(chunk, source_language=None):
+    # Partial summaries from the single-chunk and batched prompts are
+    # interchangeable, so both share one key space.
+    if source_language is not None:
+        return content_key(
+            "map-translate", GROQ_MODEL, MAP_TRANSLATE_PROMPT_VERSION, MAP_TRANSLATE_BATCH_PROMPT_VERSION,
+            source_language, chunk.page_content,
+        )
+    return content_key("map", GROQ_MODEL, MAP_PROMPT_VERSION, MAP_BATCH_PROMPT_VERSION, chunk.page_content)
+
+
+def _validate_batch(parsed, batch):
+    """Maps a batched response back onto its chunks. Returns {doc_index:
+    {"summary": ...}} for every item that validates as an IndexedSummary with
+    an in-range, not-yet-seen index; anything else is left for the
+    single-chunk fallback."""
+    items = parsed.get("summaries") if isinstance(parsed, dict) else parsed
+    if not isinstance(items, list):
+        return {}
+    valid = {}
+    for item in items:
         try:
-            return translation_chain.invoke({"text": doc.page_content, "language": source_language}).content
+            indexed = IndexedSummary.model_validate(item)
         except Exception:
-            return doc.page_content
+            continue
+        if 1 <= indexed.index <= len(batch) and indexed.summary.strip():
+            doc_index = batch[indexed.index - 1][0]
+            valid.setdefault(doc_index, {"summary": indexed.summary})
+    return valid
 
-    docs = _split_text(text, chunk_size=3000, chunk_overlap=0)
-    with ThreadPoolExecutor(max_workers=min(6, len(docs))) as executor:
-        translated_parts = list(executor.map(translate_chunk, docs))
-    return " ".join(translated_parts)
 
+def _validated_summary(result):
+    """result as a {"summary": ...} dict if it validates as a non-empty
+    Summary, else None. Applied to every single-chunk and reduce result,
+    cached or fresh, so a malformed one is neither cached nor merged."""
+    try:
+        summary = Summary.model_validate(result).summary
+    except Exception:
+        return None
+    return {"summary": summary} if summary.strip() else None
+
+
+class _MapPhase:
+    """Map phase: summarizes chunks as they are add()ed, each getting a
+    Future that resolves to its {"summary": ...} dict. Cached chunks resolve
+    immediately; uncached ones are greedily packed into batches of
+    consecutive misses bounded by MAP_BATCH_MAX_TOKENS and
+    MAP_BATCH_MAX_CHUNKS, each sent as soon as it is full, and only chunks
+    whose batched summary is missing or fails validation are retried one at
+    a time. Nothing here blocks, so chunks can be fed in while a transcript
+    is still being read and the tree reducer can start merging early chunks
+    while later ones are still in flight. A chunk that can't be summarized
+    at all resolves to a truncated copy of its own text. When
+    source_language is given the chunks are in that language and are
+    summarized straight into English (the fused translate+summarize mode)."""
+
+    def __init__(self, chunk_stats=None, tick=lambda: None, source_language=None):
+        self.chunk_stats = chunk_stats
+        self.tick = tick
+        self.source_language = source_language
+        if source_language is None:
+            self.single_chain, self.batch_chain, self.extra_inputs = "map", "map_batch", {}
+        else:
+            self.single_chain, self.batch_chain = "map_translate", "map_translate_batch"
+            self.extra_inputs = {"language": source_language}
+        self.futures = []
+        self.batch = []
+        self.batch_tokens = 0
+
+    def _new_future(self):
+        return Future()
+
+    def add(self, doc):
+        self._add(doc, chunk_cache.get(_map_chunk_key(doc, self.source_language)))
+
+    def _add(self, doc, entry):
+        """add() with doc's chunk_cache entry (None on a miss) already read."""
+        i = len(self.futures)
+        future = self._new_future()
+        self.futures.append(future)
+        cached = _validated_summary(entry)
+        if self.chunk_stats is not None:
+            self.chunk_stats["hits" if cached is not None else "misses"] += 1
+        if cached is not None:
+            future.set_result(cached)
+            self.tick()
+            return
+        tokens = estimate_tokens(doc.page_content)
+        if self.batch and (self.batch_tokens + tokens > MAP_BATCH_MAX_TOKENS or len(self.batch) >= MAP_BATCH_MAX_CHUNKS):
+            self._flush()
+        self.batch.append((i, doc))
+        self.batch_tokens += tokens
+
+    def finish(self):
+        """Sends any partly filled batch and returns every chunk's Future,
+        in order."""
+        if self.batch:
+            self._flush()
+        return self.futures
+
+    def _flush(self):
+        batch, self.batch, self.batch_tokens = self.batch, [], 0
+        if len(batch) == 1:
+            _submit(self._summarize_chunk, *batch[0])
+        else:
+            _submit(self._summarize_batch, batch)
 
-def _map_summarize(text, chain):
-    """One map pass: split text into chunks and summarize each chunk in
-    parallel. Used both for the initial transcript and, recursively, for
-    reducing an over-long combined summary — this is what lets arbitrarily
-    long transcripts be summarized without truncating any content."""
-    documents = _split_text(text)
-    if not documents:
-        raise ValueError("No documents created after splitting")
+    def _chunk_inputs(self, chunk):
+        return {"input_text": chunk.page_content, **self.extra_inputs}
+
+    def _batch_inputs(self, batch):
+        chunks = "\n\n".join(
+            f'<chunk index="{n}">\n{doc.page_content}\n</chunk>' for n, (_, doc) in enumerate(batch, 1)
+        )
+        return {"chunks": chunks, "count": len(batch), **self.extra_inputs}
 
-    def summarize_chunk(chunk):
+    def _summarize_chunk(self, i, chunk):
         try:
-            result = chain.invoke({"input_text": chunk.page_content})
-            return result
+            result = _validated_summary(run_chain(self.single_chain, self._chunk_inputs(chunk), PRIORITY_BULK))
         except Exception:
-            return {"summary": chunk.page_content[:500] + "..."}
+            result = None
+        self._chunk_done(i, chunk, result)
+
+    def _chunk_done(self, i, chunk, result):
+        """Resolves chunk i with its summary, or with a truncated copy of its
+        text when result is None (the call failed or returned no valid
+        summary)."""
+        if result is None:
+            _record_fallback(self.single_chain)
+            result = {"summary": chunk.page_content[:500] + "..."}
+        else:
+            self._cache_result(chunk, result)
+        self.futures[i].set_result(result)
+        self.tick()
 
-    with ThreadPoolExecutor(max_workers=min(6, len(documents))) as executor:
-        partial_summaries = list(executor.map(summarize_chunk, documents))
-    return " ".join(item['summary'] for item in partial_summaries)
+    def _summarize_batch(self, batch):
+        try:
+            summaries = _validate_batch(run_chain(self.batch_chain, self._batch_inputs(batch), PRIORITY_BULK), batch)
+        except Exception:
+            summaries = {}
+        for i, doc in self._batch_done(batch, summaries):
+            _submit(self._summarize_chunk, i, doc)
 
+    def _cache_result(self, chunk, result):
+        # A failed write mustn't keep the chunk from resolving.
+        try:
+            chunk_cache.set(_map_chunk_key(chunk, self.source_language), result)
+        except Exception:
+            pass
+
+    def _batch_done(self, batch, summaries):
+        """Resolves the batch's chunks that have a valid summary and returns
+        the (index, doc) pairs left to retry one at a time."""
+        retry = []
+        for i, doc in batch:
+            if i not in summaries:
+                # Not a fallback yet: the single-chunk retry may still succeed.
+                retry.append((i, doc))
+                continue
+            self._cache_result(doc, summaries[i])
+            self.futures[i].set_result(summaries[i])
+            self.tick()
+        return retry
+
+
+def _map_summarize(documents, chunk_stats=None, tick=lambda: None, source_language=None):
+    """Runs _MapPhase over an already-split document list, returning one
+    Future per chunk."""
+    phase = _MapPhase(chunk_stats, tick, source_language)
+    for doc in documents:
+        phase.add(doc)
+    return phase.finish()
+
+
+# Reduce is a fan-in tree rather than flat rounds: every REDUCE_FAN_IN
+# consecutive sibling summaries are merged by one LLM call as soon as all of
+# them are ready, so merging overlaps with map calls that are still running
+# and the critical path is O(log n) LLM latencies instead of one full pass
+# per round. Merging only adjacent siblings also keeps each merge inside one
+# contiguous stretch of the source. The tree is planned from the chunk count
+# assuming roughly EXPECTED_SUMMARY_CHARS per node, and grown by extra levels
+# (up to MAX_REDUCE_ROUNDS in total) if the top still exceeds
+# REDUCE_TARGET_CHARS once it finishes.
+REDUCE_FAN_IN = 4
+EXPECTED_SUMMARY_CHARS = 1200
+
+
+def _planned_reduce_levels(leaf_count):
+    levels, nodes = 0, leaf_count
+    while nodes > 1 and nodes * EXPECTED_SUMMARY_CHARS > REDUCE_TARGET_CHARS and levels < MAX_REDUCE_ROUNDS:
+        nodes = -(-nodes // REDUCE_FAN_IN)
+        levels += 1
+    return levels
+
+
+class _ReduceTree:
+    """Builds and tracks the fan-in merge tree over a list of leaf futures,
+    recording per-level node counts and start/finish offsets."""
+
+    def __init__(self, leaves, progress):
+        self.progress = progress
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.levels = [leaves]
+        self.timings = [{"level": 0, "nodes": len(leaves), "startedAt": 0.0, "finishedAt": None, "done": 0}]
+        for leaf in leaves:
+            leaf.add_done_callback(lambda _, level=0: self._node_done(level))
+
+    def _offset(self):
+        return round(time.monotonic() - self.started, 3)
+
+    def _node_done(self, level):
+        with self.lock:
+            timing = self.timings[level]
+            timing["done"] += 1
+            if timing["done"] == timing["nodes"]:
+                timing["finishedAt"] = self._offset()
+            done, total = timing["done"], timing["nodes"]
+        if level:
+            self.progress("reduce", round=level, maxRounds=MAX_REDUCE_ROUNDS, chunksDone=done, chunksTotal=total)
+
+    def add_level(self):
+        children = self.levels[-1]
+        level = len(self.levels)
+        # The level's timing entry must exist first: children that are
+        # already done start their merge as soon as it is registered.
+        with self.lock:
+            self.timings.append({"level": level, "nodes": -(-len(children) // REDUCE_FAN_IN), "startedAt": None, "finishedAt": None, "done": 0})
+        parents = [self._merge_when_ready(children[g:g + REDUCE_FAN_IN], level)
+                   for g in range(0, len(children), REDUCE_FAN_IN)]
+        self.levels.append(parents)
+        for parent in parents:
+            parent.add_done_callback(lambda _, level=level: self._node_done(level))
+
+    def _merge_when_ready(self, group, level):
+        parent = Future()
+        remaining = [len(group)]
+        lock = threading.Lock()
+
+        def child_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                _submit(self._merge, group, parent, level)
+
+        for child in group:
+            child.add_done_callback(child_done)
+        return parent
+
+    def _level_started(self, level):
+        with self.lock:
+            if self.timings[level]["startedAt"] is None:
+                self.timings[level]["startedAt"] = self._offset()
+
+    def _merge(self, group, parent, level):
+        # Runs on an executor thread: whatever happens, parent must resolve,
+        # or everything waiting on the tree blocks forever.
+        try:
+            self._level_started(level)
+            parent.set_result(_merge_summaries([child.result()["summary"] for child in group]))
+        except Exception as e:
+            parent.set_exception(e)
 
-def summarize_video_pipeline(original_text):
-    llm = ChatGroq(model=GROQ_MODEL, temperature=0.3)
+    def top_summaries(self):
+        return [node.result()["summary"] for node in self.levels[-1]]
 
-    if not original_text or not original_text.strip():
-        raise ValueError("Empty input text provided")
+    def level_timings(self):
+        with self.lock:
+            return [{k: v for k, v in timing.items() if k != "done"} for timing in self.timings]
 
-    # Detect language from a sample only — the whole transcript can be huge and
-    # language doesn't need the full text to identify.
-    language_detection_prompt = PromptTemplate(
-        template="""
+
+def _reduce_request(summaries):
+    """The reduce prompt's input for merging summaries, and its chunk_cache
+    key."""
+    joined = "\n\n".join(f"[Part {n}]\n{summary}" for n, summary in enumerate(summaries, 1))
+    return joined, content_key("reduce", GROQ_MODEL, REDUCE_PROMPT_VERSION, joined)
+
+
+def _merge_summaries(summaries):
+    """One reduce merge of sibling summaries into a {"summary": ...} dict,
+    served from chunk_cache when the same siblings were merged before."""
+    # A failed merge keeps its children's text rather than dropping it.
+    result = {"summary": " ".join(summaries)}
+    if len(summaries) > 1:
+        joined, key = _reduce_request(summaries)
+        try:
+            cached = _validated_summary(chunk_cache.get(key))
+            if cached is not None:
+                result = cached
+            else:
+                merged = _validated_summary(run_chain("reduce", {"partial_summaries": joined}, PRIORITY_BULK))
+                if merged is None:
+                    raise ValueError("reduce returned no summary")
+                result = merged
+                try:
+                    chunk_cache.set(key, merged)
+                except Exception:
+                    pass
+        except Exception:
+            _record_fallback("reduce")
+    return result
+
+
+def _tree_reduce(leaves, progress=_no_progress):
+    """Runs the fan-in reduce over the map phase's leaf futures. Returns the
+    top level's combined summary text and the per-level timings."""
+    tree = _ReduceTree(leaves, progress)
+    for _ in range(_planned_reduce_levels(len(leaves))):
+        tree.add_level()
+    top = tree.top_summaries()
+    while (
+        len(top) > 1
+        and len(" ".join(top)) > REDUCE_TARGET_CHARS
+        and len(tree.levels) - 1 < MAX_REDUCE_ROUNDS
+    ):
+        tree.add_level()
+        top = tree.top_summaries()
+    return " ".join(top), tree.level_timings()
+
+
+LANGUAGE_DETECTION_PROMPT = _Prompt(
+    template="""
         Identify the primary language of the following text. Respond with only
         the language's English name (e.g. "English", "Hindi", "Spanish",
         "French", "Japanese"). Nothing else.
@@ -144,19 +990,11 @@ def summarize_video_pipeline(original_text):
         Text:
         {text}
         """,
-        input_variables=["text"]
-    )
-    language_chain = language_detection_prompt | llm
-    detected_language = language_chain.invoke({"text": original_text[:3000]}).content.strip()
-
-    was_translated = False
-    if "english" not in detected_language.lower():
-        original_text = _translate_to_english(original_text, llm, detected_language)
-        was_translated = True
+    input_variables=["text"]
+)
 
-    parser = JsonOutputParser(pydantic_object=Summary)
-    prompt = PromptTemplate(
-        template="""
+MAP_PROMPT = _Prompt(
+    template="""
         You are a professional summarization assistant.
         Generate a JSON-formatted summary of the following text chunk.
         The output MUST contain only JSON with a 'summary' field.
@@ -166,28 +1004,84 @@ def summarize_video_pipeline(original_text):
 
         {format_instructions}
         """,
-        input_variables=["input_text"],
-        partial_variables={
-            "format_instructions": parser.get_format_instructions()
-        },
-    )
-    chain = prompt | llm | parser
-
-    # Map, then recursively reduce: repeatedly re-summarize the combined
-    # summary until it's short enough to format in one final pass. This lets
-    # transcripts of any length converge to a fixed-size final input instead
-    # of being truncated. MAX_REDUCE_ROUNDS is just a safety valve against a
-    # pathological case where summaries stop shrinking.
-    combined_summary = _map_summarize(original_text, chain)
-    rounds = 0
-    while len(combined_summary) > REDUCE_TARGET_CHARS and rounds < MAX_REDUCE_ROUNDS:
-        combined_summary = _map_summarize(combined_summary, chain)
-        rounds += 1
-    final_combined_summary = combined_summary
-
-    # Final formatting
-    final_prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a formatting assistant. Format this summary with proper HTML tags:
+    input_variables=["input_text"],
+    output_model=Summary,
+)
+
+MAP_BATCH_PROMPT = _Prompt(
+    template="""
+        You are a professional summarization assistant.
+        Below are {count} consecutive chunks of the same text, each wrapped in
+        <chunk index="N"> tags. Summarize every chunk independently.
+        The output MUST contain only JSON with a 'summaries' array holding
+        exactly one object per chunk, in order, each with the chunk's 'index'
+        and its 'summary'.
+
+        {chunks}
+
+        {format_instructions}
+        """,
+    input_variables=["chunks", "count"],
+    output_model=SummaryBatch,
+)
+
+# Fused translate+summarize variants of the two map prompts: the chunk is
+# read in its source language and summarized directly into English, so a
+# non-English transcript goes through the LLM once instead of being fully
+# translated first.
+MAP_TRANSLATE_PROMPT = _Prompt(
+    template="""
+        You are a professional summarization assistant.
+        The following text chunk is in {language}. Generate a JSON-formatted
+        summary of it written in English, keeping names, numbers and dates.
+        The output MUST contain only JSON with a 'summary' field.
+
+        Text chunk:
+        {input_text}
+
+        {format_instructions}
+        """,
+    input_variables=["input_text", "language"],
+    output_model=Summary,
+)
+
+MAP_TRANSLATE_BATCH_PROMPT = _Prompt(
+    template="""
+        You are a professional summarization assistant.
+        Below are {count} consecutive chunks of the same {language} text, each
+        wrapped in <chunk index="N"> tags. Summarize every chunk independently,
+        writing each summary in English and keeping names, numbers and dates.
+        The output MUST contain only JSON with a 'summaries' array holding
+        exactly one object per chunk, in order, each with the chunk's 'index'
+        and its 'summary'.
+
+        {chunks}
+
+        {format_instructions}
+        """,
+    input_variables=["chunks", "count", "language"],
+    output_model=SummaryBatch,
+)
+
+REDUCE_PROMPT = _Prompt(
+    template="""
+        You are a professional summarization assistant.
+        The following are summaries of consecutive parts of the same text.
+        Merge them into a single coherent summary that keeps every key point,
+        name, number and date, in the original order, without repetition.
+        The output MUST contain only JSON with a 'summary' field.
+
+        Partial summaries:
+        {partial_summaries}
+
+        {format_instructions}
+        """,
+    input_variables=["partial_summaries"],
+    output_model=Summary,
+)
+
+FORMAT_PROMPT = _Prompt(messages=[
+    ("system", """You are a formatting assistant. Format this summary with proper HTML tags:
          - Use <h2> for main headings
          - Use <h3> for subheadings
          - Use <p> for paragraphs
@@ -198,22 +1092,966 @@ def summarize_video_pipeline(original_text):
          - Ensure all HTML tags are properly closed
          - Do not use markdown syntax (** or *)
          - Make sure the output is valid HTML"""),
-        ("user", "{input}")
-    ])
+    ("user", "{input}")
+])
+
+
+def _normalize_transcript(text):
+    return " ".join(text.split())
+
+
+def _pipeline_fingerprint():
+    """Everything besides the transcript itself that affects the pipeline's
+    output. Part of every summary cache key."""
+    return (
+        GROQ_MODEL,
+        f"detect-v{DETECT_PROMPT_VERSION}",
+        f"translate-v{TRANSLATE_PROMPT_VERSION}",
+        f"map-v{MAP_PROMPT_VERSION}",
+        f"map-batch-v{MAP_BATCH_PROMPT_VERSION}",
+        f"map-translate-v{MAP_TRANSLATE_PROMPT_VERSION}",
+        f"map-translate-batch-v{MAP_TRANSLATE_BATCH_PROMPT_VERSION}",
+        f"reduce-v{REDUCE_PROMPT_VERSION}",
+        f"fan-in-{REDUCE_FAN_IN}",
+        f"format-v{FORMAT_PROMPT_VERSION}",
+        f"chunking-v{CHUNKING_VERSION}",
+        f"precompress-v{PRECOMPRESS_VERSION}-{PRECOMPRESS_LEVEL}-{PRECOMPRESS_BUDGET_CHARS}",
+    )
+
+
+def _language_sample(text):
+    """Up to LANGUAGE_SAMPLE_CHARS taken from the start, middle and end of
+    text, so an English intro or outro doesn't decide the language of a
+    video that is mostly in another one."""
+    if len(text) <= LANGUAGE_SAMPLE_CHARS:
+        return text
+    window = LANGUAGE_SAMPLE_CHARS // 3
+    middle = (len(text) - window) // 2
+    return " ".join((text[:window], text[middle:middle + window], text[-window:]))
+
+
+def _detect_language(text, language_hint=None):
+    """Returns (language, confidence, method). Decided locally when the
+    detector is confident enough; otherwise the LLM names the language and
+    confidence is None."""
+    sample = _language_sample(text)
+    language, confidence, method = detect_language(sample, language_hint)
+    if language is None or confidence < LOCAL_LANGUAGE_MIN_CONFIDENCE:
+        language = run_chain("detect", {"text": sample}).content.strip()
+        confidence, method = None, "llm"
+    LANGUAGE_DETECTIONS.inc(method=method)
+    return language, confidence, method
+
+
+def _filler_language(language):
+    return "English" if _is_english(language) else language
+
+
+def _precompress_level(include_translation):
+    """A caller asking for the English translation back gets the whole
+    transcript translated, so extraction is skipped for them."""
+    if include_translation and PRECOMPRESS_LEVEL != "off":
+        return "clean"
+    return PRECOMPRESS_LEVEL
+
+
+def _precompress_extracts(total_chars, include_translation):
+    """Whether a transcript of total_chars (None when not known up front)
+    may be cut down by extraction, and so has to be read in full first."""
+    keep_ratio = PRECOMPRESS_LEVELS[_precompress_level(include_translation)]
+    return keep_ratio is not None and keep_ratio < 1 and (total_chars is None or total_chars > PRECOMPRESS_BUDGET_CHARS)
+
+
+def _count_precompression(report):
+    if report is not None:
+        for step, chars in report["removed"].items():
+            PRECOMPRESS_CHARS_REMOVED.inc(chars, step=step)
+    return report
+
+
+def _precompress(text, language, include_translation):
+    """Returns (text, report) with text cleaned and, if over budget,
+    extracted; report is None when precompression is off."""
+    with span("precompress"):
+        text, report = precompress(text, _filler_language(language), _precompress_level(include_translation), PRECOMPRESS_BUDGET_CHARS)
+    return text, _count_precompression(report)
+
+
+def _stream_cleaner(language):
+    """A CaptionCleaner for transcripts summarized as they stream in, or
+    None when precompression is off."""
+    if PRECOMPRESS_LEVEL == "off":
+        return None
+    return CaptionCleaner(_filler_language(language))
+
+
+def _cleaned_segments(segments, cleaner, counts, finish=True):
+    """Yields segments through cleaner (unchanged when it is None), adding
+    the characters read and kept to counts, which may already hold the
+    totals of earlier calls over the same transcript. With finish false the
+    words cleaner holds back are left in it."""
+    def pieces():
+        for segment in segments:
+            counts["original"] += len(segment)
+            yield segment if cleaner is None else cleaner.feed(segment)
+        if cleaner is not None and finish:
+            yield cleaner.finish()
+
+    for piece in pieces():
+        if piece:
+            counts["kept"] += len(piece)
+            yield piece
+
+
+def _stream_precompression(cleaner, counts, level):
+    if cleaner is None:
+        return None
+    return _count_precompression(build_report(level, counts["original"], counts["kept"], cleaner.removed))
+
+
+def _translation_mode(text, include_translation):
+    """'full' translates the whole transcript before summarizing it; 'fused'
+    summarizes source-language chunks straight into English. Full translation
+    is kept for short transcripts, where it costs only a call or two, and
+    whenever the caller wants the translated text back."""
+    if include_translation or estimate_tokens(text) < FUSED_TRANSLATION_MIN_TOKENS:
+        return "full"
+    return "fused"
+
+
+def _summary_cache_key(text, include_translation, captions=False):
+    key_parts = _pipeline_fingerprint() + (("with-translation",) if include_translation else ()) + (("captions",) if captions else ())
+    return content_key(_normalize_transcript(text), *key_parts)
 
-    final_chain = final_prompt | llm
-    final_summary = final_chain.invoke({"input": final_combined_summary})
 
+def _cached_pipeline_result(cached, on_token):
+    if on_token is not None:
+        on_token(cached["summary"])
     return {
-        "summary": final_summary.content,
+        "languageConfidence": None,
+        "languageDetection": None,
+        "translationMode": None,
+        "translatedText": None,
+        "precompression": None,
+        **cached,
+        "cached": True,
+        "chunkCache": None,
+        "reduceLevels": None,
+        "incremental": None,
+    }
+
+
+def _format_summary(combined_summary, progress, on_token):
+    """Final HTML-formatting call, streamed to on_token when given."""
+    progress("format")
+    with span("format"):
+        if on_token is None:
+            return run_chain("format", {"input": combined_summary}).content
+        pieces = []
+
+        def emit(piece):
+            if piece.content:
+                pieces.append(piece.content)
+                on_token(piece.content)
+        stream_chain("format", {"input": combined_summary}, emit)
+        return "".join(pieces)
+
+
+def _finish_pipeline(cache_key, summary, language, translation_mode, translated_text, chunk_stats, reduce_levels, precompression):
+    detected_language, language_confidence, language_method = language
+    result = {
+        "summary": summary,
         "detectedLanguage": detected_language,
-        "wasTranslated": was_translated,
+        "languageConfidence": language_confidence,
+        "languageDetection": language_method,
+        "wasTranslated": translation_mode is not None,
+        "translationMode": translation_mode,
+        "translatedText": translated_text,
+        "precompression": precompression,
+    }
+    summary_cache.set(cache_key, result)
+    return {
+        **result,
+        "cached": False,
+        "chunkCache": _chunk_stats_summary(chunk_stats),
+        "reduceLevels": reduce_levels,
+        "incremental": None,
+    }
+
+
+def _is_english(language):
+    return "english" in language.lower()
+
+
+def summarize_video_pipeline(original_text, progress=_no_progress, on_token=None, language_hint=None, include_translation=False, language=None, captions=False):
+    """Language-detect -> translate -> map -> reduce -> HTML-format. progress
+    is called as progress(stage, **fields) at each stage boundary and as
+    chunks complete, so job mode can report where a long run currently is.
+    When on_token is given, the final formatting call is streamed and each
+    piece of HTML is passed to on_token as it arrives. language_hint is the
+    caption track's language code, if the text came from one; language is an
+    already-made (language, confidence, method) detection. With captions
+    (the text is a caption track's transcript) it is precompressed once its
+    language is known; other documents are left as they are. Long
+    non-English transcripts
+    are translated as part of the map phase unless include_translation asks
+    for the full English translation, which is then returned as
+    translatedText."""
+    if not original_text or not original_text.strip():
+        raise ValueError("Empty input text provided")
+
+    cache_key = _summary_cache_key(original_text, include_translation, captions)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return _cached_pipeline_result(cached, on_token)
+
+    chunk_stats = _new_chunk_stats()
+
+    # Detect language from a sample only — the whole transcript can be huge and
+    # language doesn't need the full text to identify.
+    if language is None:
+        progress("detect")
+        with span("detect"):
+            language = _detect_language(original_text, language_hint)
+    detected_language = language[0]
+    precompression = None
+    if captions:
+        original_text, precompression = _precompress(original_text, detected_language, include_translation)
+
+    translation_mode = None
+    translated_text = None
+    map_language = None
+    if not _is_english(detected_language):
+        translation_mode = _translation_mode(original_text, include_translation)
+        if translation_mode == "full":
+            with span("translate"):
+                original_text = _translate_to_english(original_text, detected_language, chunk_stats, progress)
+            if include_translation:
+                translated_text = original_text
+        else:
+            map_language = detected_language
+
+    # Map, then reduce through a fan-in tree until the combined summary is
+    # short enough to format in one final pass. This lets transcripts of any
+    # length converge to a fixed-size final input instead of being truncated.
+    documents = _split_text(original_text)
+    if not documents:
+        raise ValueError("No documents created after splitting")
+    progress("map", round=0, maxRounds=MAX_REDUCE_ROUNDS)
+    with span("map_reduce"):
+        leaves = _map_summarize(documents, chunk_stats, _ChunkProgress(progress, "map", len(documents)), map_language)
+        final_combined_summary, reduce_levels = _tree_reduce(leaves, progress)
+
+    final_html = _format_summary(final_combined_summary, progress, on_token)
+    return _finish_pipeline(cache_key, final_html, language, translation_mode, translated_text, chunk_stats, reduce_levels, precompression)
+
+
+class TranscriptTooShort(Exception):
+    pass
+
+
+class TranscriptTooLong(Exception):
+    """Raised as soon as a transcript is known to exceed its length limit
+    (MAX_TRANSCRIPT_CHARS, or LONGFORM_MAX_TRANSCRIPT_CHARS in long-form
+    mode); chars is its full length when the source knew it up front, else
+    None."""
+
+    def __init__(self, chars=None, limit=MAX_TRANSCRIPT_CHARS):
+        super().__init__(chars)
+        self.chars = chars
+        self.limit = limit
+
+
+MIN_TRANSCRIPT_CHARS = 50
+
+
+def _check_transcript_length(text):
+    if len(text.strip()) < MIN_TRANSCRIPT_CHARS:
+        raise TranscriptTooShort()
+    if len(text) > MAX_TRANSCRIPT_CHARS:
+        raise TranscriptTooLong(len(text))
+
+
+def _bounded_segments(stream, limit=MAX_TRANSCRIPT_CHARS):
+    """Yields stream's segments, raising TranscriptTooLong the moment the
+    running length passes limit (or before reading anything, when the source
+    already knows the length)."""
+    if stream.total_chars is not None and stream.total_chars > limit:
+        raise TranscriptTooLong(stream.total_chars, limit)
+    total = 0
+    for segment in stream:
+        total += len(segment)
+        if total > limit:
+            raise TranscriptTooLong(None, limit)
+        yield segment
+
+
+def _read_in_full(text, on_text):
+    """Hands a transcript that has been read in full to on_text, if given, so
+    the caller keeps it whatever happens next; then checks its length."""
+    if on_text is not None:
+        on_text(text)
+    _check_transcript_length(text)
+    return text
+
+
+def summarize_transcript_stream(stream, progress=_no_progress, on_token=None, include_translation=False, on_text=None):
+    """summarize_video_pipeline for a freshly fetched TranscriptStream whose
+    source doesn't know its length up front (one that does already holds
+    the whole track, and is summarized as a whole). The transcript is
+    chunked as its segments are read, map calls go out as soon as the first
+    chunks are cut, and the length ceiling is enforced on the fly, so an
+    over-limit transcript is never assembled. Segments are cleaned as they
+    are read; a transcript that precompression may extract from is read in
+    full and summarized as a whole instead. The summary cache is checked as
+    soon as the last segment is read, before the map phase's tail is sent.
+    on_text(transcript_text) is called at that point too. Returns
+    (pipeline_result, transcript_text); raises TranscriptTooShort or
+    TranscriptTooLong."""
+    segments = _bounded_segments(stream)
+    text = None
+    parts = []
+    head_chars = 0
+    exhausted = True
+    # Language decides which map prompt every chunk gets, so a sample has to
+    # be read before the first chunk can be sent.
+    for segment in segments:
+        parts.append(segment)
+        head_chars += len(segment)
+        if head_chars >= LANGUAGE_SAMPLE_CHARS:
+            exhausted = False
+            break
+    head = "".join(parts)
+    if exhausted:
+        text = _read_in_full(head, on_text)
+
+    language_hint = "en" if stream.translated_by_youtube else stream.language
+    progress("detect")
+    with span("detect"):
+        language = _detect_language(head, language_hint)
+    detected_language = language[0]
+
+    english = _is_english(detected_language)
+    if not english and not include_translation:
+        # Full translation is kept for short transcripts, so read until the
+        # transcript either ends or is clearly long enough for fused mode.
+        tokens = estimate_tokens(head)
+        while not exhausted and tokens < FUSED_TRANSLATION_MIN_TOKENS:
+            segment = next(segments, None)
+            if segment is None:
+                exhausted = True
+                break
+            parts.append(segment)
+            tokens += estimate_tokens(segment)
+    if exhausted or (not english and include_translation) or _precompress_extracts(stream.total_chars, include_translation):
+        # Whole-transcript paths (short transcripts, full translation,
+        # extraction) gain nothing from streaming; they get the summary cache
+        # checked first.
+        parts.extend(segments)
+        if text is None:
+            text = _read_in_full("".join(parts), on_text)
+        return summarize_video_pipeline(text, progress, on_token, include_translation=include_translation, language=language, captions=True), text
+
+    chunk_stats = _new_chunk_stats()
+    progress("map", round=0, maxRounds=MAX_REDUCE_ROUNDS)
+    tick = _ChunkProgress(progress, "map")
+    with span("map_reduce"):
+        splitter = _StreamingSplitter()
+        phase = _MapPhase(chunk_stats, tick, None if english else detected_language)
+        cleaner, counts = _stream_cleaner(detected_language), {"original": 0, "kept": 0}
+
+        def read():
+            yield from list(parts)
+            for segment in segments:
+                parts.append(segment)
+                yield segment
+        for piece in _cleaned_segments(read(), cleaner, counts, finish=False):
+            for doc in splitter.feed(piece):
+                phase.add(doc)
+        text = _read_in_full("".join(parts), on_text)
+        cache_key = _summary_cache_key(text, include_translation, captions=True)
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return _cached_pipeline_result(cached, on_token), text
+
+        for piece in _cleaned_segments(iter(()), cleaner, counts):
+            for doc in splitter.feed(piece):
+                phase.add(doc)
+        for doc in splitter.finish():
+            phase.add(doc)
+        leaves = phase.finish()
+        tick.set_total(len(leaves))
+        final_combined_summary, reduce_levels = _tree_reduce(leaves, progress)
+
+    final_html = _format_summary(final_combined_summary, progress, on_token)
+    translation_mode = None if english else "fused"
+    precompression = _stream_precompression(cleaner, counts, _precompress_level(include_translation))
+    return _finish_pipeline(cache_key, final_html, language, translation_mode, None, chunk_stats, reduce_levels, precompression), text
+
+
+def _spilled_reduce(store, progress, started):
+    """Fan-in reduce over the level-0 summaries in store, one level at a time:
+    each level's merges are read from and written back to the store with at
+    most LONGFORM_WINDOW_CHUNKS in flight. Levels are added until the top fits
+    REDUCE_TARGET_CHARS or is a single node. Returns the top level's combined
+    text and per-level timings (offsets from started, when the map phase
+    began), as _tree_reduce does."""
+    timings = []
+    level = 0
+    nodes, chars = store.level_size(0)
+    timings.append({"level": 0, "nodes": nodes, "startedAt": 0.0, "finishedAt": round(time.monotonic() - started, 3)})
+    while nodes > 1 and chars > REDUCE_TARGET_CHARS:
+        parents = -(-nodes // REDUCE_FAN_IN)
+        timing = {"level": level + 1, "nodes": parents, "startedAt": round(time.monotonic() - started, 3), "finishedAt": None}
+        in_flight = deque()
+        done = 0
+        for g in range(parents):
+            children = store.get_range(level, g * REDUCE_FAN_IN, (g + 1) * REDUCE_FAN_IN)
+            in_flight.append(_submit(_merge_summaries, children))
+            while in_flight and (len(in_flight) >= LONGFORM_WINDOW_CHUNKS or g == parents - 1):
+                store.put_many(level + 1, done, [in_flight.popleft().result()["summary"]])
+                done += 1
+                progress("reduce", round=level + 1, maxRounds=None, chunksDone=done, chunksTotal=parents)
+        timing["finishedAt"] = round(time.monotonic() - started, 3)
+        timings.append(timing)
+        level += 1
+        nodes, chars = store.level_size(level)
+    return " ".join(store.get_range(level, 0, nodes)), timings
+
+
+# Raw transcript segments are spilled at this SpillStore level (below the
+# map phase's level 0), LONGFORM_SPILL_SEGMENTS per write.
+LONGFORM_RAW_LEVEL = -1
+LONGFORM_SPILL_SEGMENTS = 2000
+
+
+def summarize_longform_stream(stream, progress=_no_progress, on_token=None):
+    """Memory-bounded counterpart of summarize_transcript_stream for
+    transcripts past MAX_TRANSCRIPT_CHARS (up to
+    LONGFORM_MAX_TRANSCRIPT_CHARS). The raw segments are first hashed for
+    the summary cache key and spilled to a SpillStore, so a repeat request
+    is answered before any LLM call. Otherwise they are replayed from the
+    store: chunks are cut as segments are read and mapped
+    LONGFORM_WINDOW_CHUNKS at a time; each window's summaries are written to
+    the store once it finishes, while the next window's calls are in flight,
+    and the reduce tree is then built from the store (see _spilled_reduce).
+    Segments are cleaned as they are read, but never extracted from.
+    Non-English transcripts always use the fused translate+summarize mode.
+    Returns (pipeline_result, transcript_chars); raises TranscriptTooShort
+    or TranscriptTooLong."""
+    with SpillStore() as store:
+        # The key hashes the raw transcript; normalizing it first would need
+        # the whole text in memory.
+        digest = hashlib.sha256()
+        spilled = transcript_chars = 0
+        batch = []
+        for segment in _bounded_segments(stream, LONGFORM_MAX_TRANSCRIPT_CHARS):
+            digest.update(segment.encode("utf-8"))
+            transcript_chars += len(segment)
+            batch.append(segment)
+            if len(batch) >= LONGFORM_SPILL_SEGMENTS:
+                store.put_many(LONGFORM_RAW_LEVEL, spilled, batch)
+                spilled += len(batch)
+                batch.clear()
+        store.put_many(LONGFORM_RAW_LEVEL, spilled, batch)
+        spilled += len(batch)
+        cache_key = content_key("longform", digest.hexdigest(), *_pipeline_fingerprint())
+        cached = summary_cache.get(cache_key)
+        if cached is not None:
+            return _cached_pipeline_result(cached, on_token), transcript_chars
+
+        def replay():
+            for start in range(0, spilled, LONGFORM_SPILL_SEGMENTS):
+                yield from store.get_range(LONGFORM_RAW_LEVEL, start, start + LONGFORM_SPILL_SEGMENTS)
+
+        segments = replay()
+        head_parts = []
+        head_chars = 0
+        for segment in segments:
+            head_parts.append(segment)
+            head_chars += len(segment)
+            if head_chars >= LANGUAGE_SAMPLE_CHARS:
+                break
+        head = "".join(head_parts)
+        if len(head.strip()) < MIN_TRANSCRIPT_CHARS:
+            raise TranscriptTooShort()
+
+        language_hint = "en" if stream.translated_by_youtube else stream.language
+        progress("detect")
+        with span("detect"):
+            language = _detect_language(head, language_hint)
+        english = _is_english(language[0])
+
+        chunk_stats = _new_chunk_stats()
+        progress("map", round=0, maxRounds=None)
+        tick = _ChunkProgress(progress, "map")
+        cleaner, counts = _stream_cleaner(language[0]), {"original": 0, "kept": 0}
+        started = time.monotonic()
+        with span("map_reduce"):
+            splitter = _StreamingSplitter()
+            window = []
+            in_flight = deque()
+            mapped = [0]
+
+            def send_window():
+                in_flight.append(_map_summarize(window, chunk_stats, tick, None if english else language[0]))
+                window.clear()
+
+            def drain(keep):
+                while len(in_flight) > keep:
+                    futures = in_flight.popleft()
+                    store.put_many(0, mapped[0], [future.result()["summary"] for future in futures])
+                    mapped[0] += len(futures)
+
+            for piece in _cleaned_segments(itertools.chain(head_parts, segments), cleaner, counts):
+                for doc in splitter.feed(piece):
+                    window.append(doc)
+                    if len(window) >= LONGFORM_WINDOW_CHUNKS:
+                        send_window()
+                        drain(1)
+            window.extend(splitter.finish())
+            if window:
+                send_window()
+            drain(0)
+            tick.set_total(mapped[0])
+            final_combined_summary, reduce_levels = _spilled_reduce(store, progress, started)
+
+    final_html = _format_summary(final_combined_summary, progress, on_token)
+    translation_mode = None if english else "fused"
+    precompression = _stream_precompression(cleaner, counts, PRECOMPRESS_LEVEL)
+    return _finish_pipeline(cache_key, final_html, language, translation_mode, None, chunk_stats, reduce_levels, precompression), transcript_chars
+
+
+# Incremental mode ("incremental": true on /summarize-video) is for live and
+# premiering videos that are re-submitted while their transcript grows. Each
+# video's progress is kept between refreshes: how much of the raw transcript
+# has been read (with a digest of that prefix), the splitter and cleaner
+# state at that point, and the stable nodes of its reduce tree, i.e. the
+# summaries of every chunk cut so far and every merge of REDUCE_FAN_IN stable
+# siblings. A refresh maps only the chunks cut from the new text plus the
+# still-open tail, re-merges the tree's right edge and re-formats, so its
+# cost follows the new content rather than the length of the stream.
+# Extraction would pick different sentences on every refresh, so these
+# transcripts are only cleaned.
+incremental_states = SqliteCache("incremental", max_entries=2000, ttl_seconds=2 * 24 * 3600)
+
+
+class TranscriptRevised(Exception):
+    """The transcript no longer starts with the text earlier incremental
+    refreshes summarized (its captions were regenerated, say)."""
+
+
+def _incremental_key(video_id):
+    return content_key("incremental", video_id, *_pipeline_fingerprint())
+
+
+# Refreshes of one video read, extend and save the same state, so within a
+# process they take turns, each fetching the transcript only once it holds
+# the video's lock; a refresh that fetched earlier would otherwise find a
+# state saved from a longer transcript. Across worker processes the save
+# keeps whichever state has read further.
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _refresh_lock(video_id):
+    with _refresh_locks_guard:
+        entry = _refresh_locks.setdefault(video_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _refresh_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _refresh_locks[video_id]
+
+
+def _skip_prefix(segments, chars, digest, parts):
+    """Reads the first chars characters of segments into digest (and parts,
+    when given) and returns whatever the last segment read has past them."""
+    rest = ""
+    while chars:
+        segment = next(segments, None)
+        if segment is None:
+            raise TranscriptRevised()
+        head, rest = segment[:chars], segment[chars:]
+        digest.update(head.encode("utf-8"))
+        if parts is not None:
+            parts.append(head)
+        chars -= len(head)
+    return rest
+
+
+def _incremental_reduce(levels, tail, progress, started):
+    """Fan-in reduce for incremental mode. levels[k] holds the stable nodes
+    of level k, tail the summaries of the chunks still open at the end of
+    the transcript. A parent is stable, and appended to levels[k + 1], once
+    all REDUCE_FAN_IN of its children are; only parents missing from levels
+    and those over unstable nodes (the tree's right edge) are merged. Levels
+    are added until the top fits REDUCE_TARGET_CHARS or is a single node, as
+    in _spilled_reduce, whose return value this matches."""
+    nodes = levels[0] + tail
+    timings = [{"level": 0, "nodes": len(nodes), "startedAt": 0.0, "finishedAt": round(time.monotonic() - started, 3)}]
+    level = 0
+    while len(nodes) > 1 and len(" ".join(nodes)) > REDUCE_TARGET_CHARS:
+        if len(levels) == level + 1:
+            levels.append([])
+        stable, parents = levels[level], levels[level + 1]
+        timing = {"level": level + 1, "nodes": -(-len(nodes) // REDUCE_FAN_IN), "startedAt": round(time.monotonic() - started, 3), "finishedAt": None}
+        full = len(stable) // REDUCE_FAN_IN
+        missing = [_submit(_merge_summaries, stable[g * REDUCE_FAN_IN:(g + 1) * REDUCE_FAN_IN]) for g in range(len(parents), full)]
+        edge = [_submit(_merge_summaries, nodes[i:i + REDUCE_FAN_IN]) for i in range(full * REDUCE_FAN_IN, len(nodes), REDUCE_FAN_IN)]
+        parents.extend(future.result()["summary"] for future in missing)
+        nodes = parents + [future.result()["summary"] for future in edge]
+        progress("reduce", round=level + 1, maxRounds=None, chunksDone=len(missing) + len(edge), chunksTotal=len(missing) + len(edge))
+        timing["finishedAt"] = round(time.monotonic() - started, 3)
+        timings.append(timing)
+        level += 1
+    return " ".join(nodes), timings
+
+
+def summarize_incremental_stream(video_id, stream, progress=_no_progress, on_token=None, limit=MAX_TRANSCRIPT_CHARS, keep_text=True):
+    """Summarizes video_id's TranscriptStream starting from the state its
+    last incremental refresh left (or from scratch), and saves the state for
+    the next one. The already-read prefix is only hashed, to check it hasn't
+    changed. Non-English transcripts always use the fused
+    translate+summarize mode. Returns (pipeline_result, transcript_text,
+    transcript_chars), transcript_text being None unless keep_text; raises
+    TranscriptTooShort, TranscriptTooLong or TranscriptRevised."""
+    key = _incremental_key(video_id)
+    state = incremental_states.get(key)
+    segments = _bounded_segments(stream, limit)
+    parts = [] if keep_text else None
+    digest = hashlib.sha256()
+    head = []
+    if state is not None:
+        rest = _skip_prefix(segments, state["offset"], digest, parts)
+        if digest.hexdigest() != state["prefixDigest"]:
+            raise TranscriptRevised()
+        if rest:
+            head.append(rest)
+        language = tuple(state["language"])
+    else:
+        head_chars = 0
+        for segment in segments:
+            head.append(segment)
+            head_chars += len(segment)
+            if head_chars >= LANGUAGE_SAMPLE_CHARS:
+                break
+        sample = "".join(head)
+        if len(sample.strip()) < MIN_TRANSCRIPT_CHARS:
+            raise TranscriptTooShort()
+        language_hint = "en" if stream.translated_by_youtube else stream.language
+        progress("detect")
+        with span("detect"):
+            language = _detect_language(sample, language_hint)
+        state = {"offset": 0, "prefixDigest": None, "language": list(language), "splitter": None, "cleaner": None,
+                 "counts": {"original": 0, "kept": 0}, "levels": [[]]}
+    english = _is_english(language[0])
+    splitter = _StreamingSplitter() if state["splitter"] is None else _StreamingSplitter.restore(state["splitter"])
+    if state["cleaner"] is None:
+        cleaner = _stream_cleaner(language[0])
+    else:
+        cleaner = CaptionCleaner.restore(state["cleaner"], _filler_language(language[0]))
+    counts = dict(state["counts"])
+
+    chunk_stats = _new_chunk_stats()
+    progress("map", round=0, maxRounds=None)
+    tick = _ChunkProgress(progress, "map")
+    started = time.monotonic()
+    with span("map_reduce"):
+        phase = _MapPhase(chunk_stats, tick, None if english else language[0])
+
+        def read():
+            for segment in itertools.chain(head, segments):
+                digest.update(segment.encode("utf-8"))
+                if parts is not None:
+                    parts.append(segment)
+                yield segment
+        for piece in _cleaned_segments(read(), cleaner, counts, finish=False):
+            for doc in splitter.feed(piece):
+                phase.add(doc)
+        new_chunks = len(phase.futures)
+        transcript_chars = counts["original"]
+        text = "".join(parts) if parts is not None else None
+        cache_key = content_key("incremental", digest.hexdigest(), *_pipeline_fingerprint())
+        if transcript_chars == state["offset"]:
+            cached = summary_cache.get(cache_key)
+            if cached is not None:
+                return _cached_pipeline_result(cached, on_token), text, transcript_chars
+        saved = {
+            **state,
+            "offset": transcript_chars,
+            "prefixDigest": digest.hexdigest(),
+            "splitter": splitter.snapshot(),
+            "cleaner": cleaner.snapshot() if cleaner is not None else None,
+            "counts": dict(counts),
+        }
+        # The open tail: words the cleaner held back and the splitter's
+        # partial chunk. Summarized now, but not kept.
+        for piece in _cleaned_segments(iter(()), cleaner, counts):
+            for doc in splitter.feed(piece):
+                phase.add(doc)
+        for doc in splitter.finish():
+            phase.add(doc)
+        futures = phase.finish()
+        tick.set_total(len(futures))
+        levels = [list(nodes) for nodes in state["levels"]]
+        levels[0].extend(future.result()["summary"] for future in futures[:new_chunks])
+        tail = [future.result()["summary"] for future in futures[new_chunks:]]
+        final_combined_summary, reduce_levels = _incremental_reduce(levels, tail, progress, started)
+        # After a cancel the new chunks are fallbacks; they mustn't be kept.
+        _check_stream_cancelled()
+        new_state = {**saved, "levels": levels}
+
+        def keep_furthest(stored):
+            # Another worker process may have saved a refresh that read
+            # further in the meantime.
+            return stored if stored is not None and stored["offset"] > new_state["offset"] else new_state
+        incremental_states.update(key, keep_furthest)
+
+    final_html = _format_summary(final_combined_summary, progress, on_token)
+    translation_mode = None if english else "fused"
+    precompression = None
+    if cleaner is not None:
+        precompression = build_report(PRECOMPRESS_LEVEL, counts["original"], counts["kept"], cleaner.removed)
+        # The report covers the whole transcript; the metric only what this
+        # refresh removed.
+        before = state["cleaner"]["removed"] if state["cleaner"] is not None else {}
+        for step, chars in cleaner.removed.items():
+            PRECOMPRESS_CHARS_REMOVED.inc(chars - before.get(step, 0), step=step)
+    result = _finish_pipeline(cache_key, final_html, language, translation_mode, None, chunk_stats, reduce_levels, precompression)
+    result["incremental"] = {
+        "previousChars": state["offset"],
+        "newChars": transcript_chars - state["offset"],
+        "newChunks": new_chunks,
+        "openChunks": len(tail),
+        "totalChunks": len(levels[0]) + len(tail),
     }
+    return result, text, transcript_chars
+
 
 @app.route("/")
 def home():
     return "Flask app is running!"
 
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "summaries": summary_cache.stats(),
+        "chunks": chunk_cache.stats(),
+        "transcripts": transcript_cache.stats(),
+        "qaSessions": qa_sessions.stats(),
+        "verdicts": verdict_cache.stats(),
+        "incremental": incremental_states.stats(),
+        "llmScheduler": llm_scheduler.stats(),
+        "transcriptSources": transcript_fetcher.stats(),
+        "passageIndex": passage_index.stats(),
+        "status": "success"
+    })
+
+
+def _collect_cache_and_scheduler_stats():
+    caches = {"summaries": summary_cache, "chunks": chunk_cache, "transcripts": transcript_cache, "qa_sessions": qa_sessions, "verdicts": verdict_cache, "incremental": incremental_states}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    scheduler = llm_scheduler.stats()
+    sources = transcript_fetcher.stats()["sources"]
+    return [
+        ("brieflens_cache_entries", "gauge", "Entries currently stored per cache",
+         [({"cache": name}, s["entries"]) for name, s in stats.items()]),
+        ("brieflens_cache_hits_total", "counter", "Cache hits since process start",
+         [({"cache": name}, s["hits"]) for name, s in stats.items()]),
+        ("brieflens_cache_misses_total", "counter", "Cache misses since process start",
+         [({"cache": name}, s["misses"]) for name, s in stats.items()]),
+        ("brieflens_llm_scheduler_active", "gauge", "LLM calls currently in flight", [({}, scheduler["active"])]),
+        ("brieflens_llm_scheduler_waiting", "gauge", "LLM calls waiting for admission", [({}, scheduler["waiting"])]),
+        ("brieflens_llm_rate_limited_total", "counter", "Provider 429 responses seen by the scheduler", [({}, scheduler["rateLimited"])]),
+        ("brieflens_transcript_fetches_total", "counter", "Transcript fetch attempts per source and outcome, including hedged losers",
+         [({"source": name, "outcome": outcome}, s[key]) for name, s in sources.items() for outcome, key in (("success", "successes"), ("failure", "failures"))]),
+        ("brieflens_transcript_fetch_wins_total", "counter", "Transcripts served per source", [({"source": name}, s["wins"]) for name, s in sources.items()]),
+        ("brieflens_transcript_source_success_rate", "gauge", "Recent success rate per transcript source", [({"source": name}, s["successRate"]) for name, s in sources.items()]),
+        ("brieflens_transcript_source_latency_seconds", "gauge", "Recent successful fetch latency per transcript source", [({"source": name}, s["latencySeconds"]) for name, s in sources.items()]),
+    ]
+
+
+registry.register_collector(_collect_cache_and_scheduler_stats)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.monotonic()
+
+
+@app.after_request
+def _observe_request_duration(response):
+    started = g.get("request_started")
+    if started is not None:
+        HTTP_SECONDS.observe(
+            time.monotonic() - started,
+            endpoint=request.endpoint or "unknown",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _wants_timings():
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and bool(data.get("includeTimings"))
+
+
+def _traced(job_fn, include_timings):
+    """Wraps a job_fn(progress, ...) so that its run is recorded on a fresh
+    RequestTrace. When the client sent "includeTimings": true, the per-stage
+    and LLM breakdown is added to the response body as "timings"."""
+    def run(*args):
+        with request_trace() as trace:
+            body, http_status = job_fn(*args)
+        if include_timings:
+            body = {**body, "timings": trace.summary()}
+        return body, http_status
+    return run
+
+def _translation_fields(pipeline_result):
+    fields = {"translationMode": pipeline_result["translationMode"]}
+    if pipeline_result["translatedText"] is not None:
+        fields["translatedText"] = pipeline_result["translatedText"]
+    return fields
+
+
+def _text_summary_body(pipeline_result):
+    return {
+        "summarizedText": pipeline_result["summary"],
+        "detectedLanguage": pipeline_result["detectedLanguage"],
+        "languageConfidence": pipeline_result["languageConfidence"],
+        "languageDetection": pipeline_result["languageDetection"],
+        "wasTranslated": pipeline_result["wasTranslated"],
+        **_translation_fields(pipeline_result),
+        "cached": pipeline_result["cached"],
+        "chunkCache": pipeline_result["chunkCache"],
+        "reduceLevels": pipeline_result["reduceLevels"],
+        "precompression": pipeline_result["precompression"],
+        "status": "success"
+    }
+
+
+def _summarize_text_job(original_text, progress=_no_progress, on_token=None, include_translation=False):
+    """Body of /summarize, shared by its synchronous and job modes. Returns
+    (response_body, http_status)."""
+    try:
+        pipeline_result = summarize_video_pipeline(original_text, progress, on_token, include_translation=include_translation)
+        return _text_summary_body(pipeline_result), 200
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
+        }, 500
+
+
+def _run_or_enqueue(data, kind, job_fn):
+    """Runs job_fn inline, or, when the request asked for job mode with
+    "async": true, queues it on summary_jobs and answers 202 with a job ID to
+    poll at /jobs/<job_id>."""
+    job_fn = _traced(job_fn, _wants_timings())
+    if data.get("async"):
+        try:
+            job_id = summary_jobs.submit(job_fn, kind)
+        except JobQueueFull:
+            return jsonify({"error": "queue_full", "message": "Too many summaries are queued right now. Please try again shortly.", "status": "error"}), 429
+        return jsonify({"jobId": job_id, "statusUrl": f"/jobs/{job_id}", "status": "queued"}), 202
+
+    body, http_status = job_fn(_no_progress)
+    return jsonify(body), http_status
+
+
+SSE_KEEPALIVE_SECONDS = 15
+# Streaming jobs run on this pool rather than on a thread per request, so
+# open streams can't pile up threads without bound. Streams beyond it wait
+# for a worker, getting keep-alives meanwhile.
+SSE_MAX_CONCURRENCY = int(os.environ.get("SSE_MAX_CONCURRENCY", 16))
+sse_executor = ThreadPoolExecutor(max_workers=SSE_MAX_CONCURRENCY, thread_name_prefix="sse")
+
+
+def _sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _sse_response(job_fn):
+    """Runs job_fn(progress, on_token) on sse_executor and streams what it
+    reports as Server-Sent Events: 'progress' events for stage/chunk
+    updates, 'token' events for each piece of LLM output, then a single
+    'result' (or 'error') event carrying the same body the non-streaming
+    endpoint would have returned. Comment lines are sent while the pipeline is
+    quiet so proxies don't drop the idle connection. Once the client
+    disconnects the job is cancelled: progress() and on_token raise
+    StreamCancelled on the job's thread, and its remaining LLM calls raise
+    it wherever they run."""
+    job_fn = _traced(job_fn, _wants_timings())
+    events = queue.Queue()
+    cancelled = threading.Event()
+    job_thread = None
+
+    def check_cancelled():
+        # Only the job's own thread unwinds; callbacks on llm_executor
+        # threads must not leave their chunk's bookkeeping half done.
+        if cancelled.is_set() and threading.current_thread() is job_thread:
+            raise StreamCancelled()
+
+    def progress(stage, **fields):
+        check_cancelled()
+        events.put(("progress", {"stage": stage, **fields}))
+
+    def on_token(text):
+        check_cancelled()
+        events.put(("token", {"text": text}))
+
+    def run():
+        nonlocal job_thread
+        job_thread = threading.current_thread()
+        _stream_cancelled.set(cancelled)
+        try:
+            if cancelled.is_set():
+                return
+            body, http_status = job_fn(progress, on_token)
+            events.put(("result" if http_status < 400 else "error", {**body, "httpStatus": http_status}))
+        except Exception as e:
+            events.put(("error", {"error": str(e), "status": "error", "httpStatus": 500}))
+        finally:
+            events.put(None)
+
+    # A fresh context, so the cancel flag set in run() can't outlive the job
+    # on the pool thread.
+    sse_executor.submit(contextvars.Context().run, run)
+
+    def generate():
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                yield _sse_event(*item)
+        except GeneratorExit:
+            cancelled.set()
+            raise
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
 @app.route('/summarize', methods=['POST'])
 def summarize():
     try:
@@ -225,13 +2063,8 @@ def summarize():
         if not original_text:
             return jsonify({"error": "Missing 'originalText' field"}), 400
 
-        pipeline_result = summarize_video_pipeline(original_text)
-        return jsonify({
-            "summarizedText": pipeline_result["summary"],
-            "detectedLanguage": pipeline_result["detectedLanguage"],
-            "wasTranslated": pipeline_result["wasTranslated"],
-            "status": "success"
-        })
+        include_translation = bool(data.get("includeTranslation"))
+        return _run_or_enqueue(data, "summarize", lambda progress: _summarize_text_job(original_text, progress, include_translation=include_translation))
 
     except Exception as e:
         return jsonify({
@@ -239,6 +2072,26 @@ def summarize():
             "status": "error"
         }), 500
 
+@app.route('/summarize/stream', methods=['POST'])
+def summarize_stream():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data provided"}), 400
+
+    original_text = data.get("originalText")
+    if not original_text:
+        return jsonify({"error": "Missing 'originalText' field"}), 400
+
+    include_translation = bool(data.get("includeTranslation"))
+    return _sse_response(lambda progress, on_token: _summarize_text_job(original_text, progress, on_token, include_translation))
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = summary_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "job_not_found", "message": "Unknown or expired job ID", "status": "error"}), 404
+    return jsonify(job)
+
 _VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
 _YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"}
 
@@ -273,9 +2126,27 @@ def extract_video_id(url):
     return None
 
 
+class TranscriptStream:
+    """A fetched caption track, read segment by segment: iterating yields
+    text pieces that concatenate to the transcript, so callers can chunk it
+    (and enforce MAX_TRANSCRIPT_CHARS) without first building one big string.
+    total_chars is the transcript's exact length when the source already
+    knows it, else None."""
+
+    def __init__(self, segments, language, source, translated_by_youtube=False, total_chars=None):
+        self.segments = segments
+        self.language = language
+        self.source = source
+        self.translated_by_youtube = translated_by_youtube
+        self.total_chars = total_chars
+
+    def __iter__(self):
+        return iter(self.segments)
+
+
 def fetch_youtube_transcript(video_id):
-    """Fetches a transcript in any available language, returning
-    (transcript_text, language_code, was_translated_by_youtube). Preference
+    """Fetches a transcript in any available language, returning a
+    TranscriptStream (language is the track's language code). Preference
     order: manually-created English > auto-generated English > any transcript
     YouTube can translate to English > the first available transcript as-is
     (the summarization pipeline will detect its language and translate it).
@@ -288,30 +2159,34 @@ def fetch_youtube_transcript(video_id):
     if not available:
         raise NoTranscriptFound(video_id, [], transcript_list)
 
-    def fetch_text(transcript_obj):
-        fetched = transcript_obj.fetch()
-        return " ".join(snippet.text for snippet in fetched)
+    def fetch_stream(transcript_obj, language_code, translated=False):
+        snippets = transcript_obj.fetch().snippets
+
+        def segments():
+            for n, snippet in enumerate(snippets):
+                yield snippet.text if n == 0 else " " + snippet.text
+        total_chars = sum(len(snippet.text) for snippet in snippets) + max(0, len(snippets) - 1)
+        return TranscriptStream(segments(), language_code, "youtube_transcript_api", translated, total_chars)
 
     manual_en = next((t for t in available if t.language_code.startswith("en") and not t.is_generated), None)
     if manual_en:
-        return fetch_text(manual_en), manual_en.language_code, False
+        return fetch_stream(manual_en, manual_en.language_code)
 
     auto_en = next((t for t in available if t.language_code.startswith("en")), None)
     if auto_en:
-        return fetch_text(auto_en), auto_en.language_code, False
+        return fetch_stream(auto_en, auto_en.language_code)
 
     for t in available:
         if t.is_translatable:
             try:
-                translated = t.translate("en")
-                return fetch_text(translated), t.language_code, True
+                return fetch_stream(t.translate("en"), t.language_code, translated=True)
             except Exception:
                 continue
 
     # No English transcript and no translatable one — take whatever exists in
     # its native language; summarize_video_pipeline() will translate it.
     fallback = available[0]
-    return fetch_text(fallback), fallback.language_code, False
+    return fetch_stream(fallback, fallback.language_code)
 
 
 def fetch_youtube_transcript_ytdlp(video_id):
@@ -320,7 +2195,10 @@ def fetch_youtube_transcript_ytdlp(video_id):
     base, typically patched within hours of a YouTube-side change) with its own
     request/client patterns, so its failure modes don't fully correlate with
     youtube_transcript_api's — this exists purely to raise availability, not to
-    replace the primary source. Returns (transcript_text, language_code)."""
+    replace the primary source. Returns a TranscriptStream. yt-dlp is only
+    imported the first time this runs: it is large and most fetches never
+    get here."""
+    import yt_dlp
     url = f"https://www.youtube.com/watch?v={video_id}"
     ydl_opts = {"skip_download": True, "quiet": True, "no_warnings": True}
 
@@ -351,179 +2229,969 @@ def fetch_youtube_transcript_ytdlp(video_id):
         raw = ydl.urlopen(fmt["url"]).read()
         data = json.loads(raw)
         text_parts = [
-            seg["utf8"]
+            seg["utf8"].replace("\n", " ")
             for event in data.get("events", [])
             for seg in (event.get("segs") or [])
             if seg.get("utf8")
         ]
-        text = "".join(text_parts).replace("\n", " ").strip()
-        if not text:
+        # Same text as "".join(text_parts).strip(), without building it.
+        while text_parts and not text_parts[0].strip():
+            text_parts.pop(0)
+        while text_parts and not text_parts[-1].strip():
+            text_parts.pop()
+        if not text_parts:
             raise RuntimeError("yt-dlp returned an empty transcript")
-        return text, lang
+        text_parts[0] = text_parts[0].lstrip()
+        text_parts[-1] = text_parts[-1].rstrip()
+        return TranscriptStream(iter(text_parts), lang, "yt-dlp", total_chars=sum(len(part) for part in text_parts))
 
 
-@app.route('/summarize-video', methods=['POST'])
-def summarize_video():
-    data = request.get_json(silent=True)
+class CachedTranscriptsDisabled(Exception):
+    """Negative transcript-cache hit: captions were disabled on the last fetch."""
+
+
+class CachedNoTranscriptFound(Exception):
+    """Negative transcript-cache hit: no transcript existed on the last fetch."""
+
+
+_NEGATIVE_TRANSCRIPT_ERRORS = {
+    "captions_disabled": CachedTranscriptsDisabled,
+    "no_transcript": CachedNoTranscriptFound,
+}
+
+
+def _cached_transcript(video_id):
+    """Transcript-cache lookup: the cached entry (with 'cached': True), or
+    None on a miss. Negative entries re-raise the error they recorded."""
+    entry = transcript_cache.get(video_id)
+    if entry is None:
+        return None
+    if "error" in entry:
+        raise _NEGATIVE_TRANSCRIPT_ERRORS[entry["error"]](video_id)
+    app.logger.info(f"Transcript cache hit for {video_id} ({entry['source']}, {len(entry['text'])} chars)")
+    return {**entry, "cached": True}
+
+
+# Both extractors are raced rather than tried strictly in turn: the
+# better-ranked one (by recent success rate and latency) starts first, and the
+# other joins if it hasn't produced a transcript within
+# TRANSCRIPT_HEDGE_DELAY_SECONDS, straight away if it fails, or from the start
+# for videos that failed on either source before. A hanging primary used to
+# add its whole timeout before the fallback even began.
+TRANSCRIPT_HEDGE_DELAY_SECONDS = float(os.environ.get("TRANSCRIPT_HEDGE_DELAY_SECONDS", 3.0))
+
+
+def _fetch_with_api(video_id):
+    with span("fetch_transcript"):
+        return fetch_youtube_transcript(video_id)
+
+
+def _fetch_with_ytdlp(video_id):
+    with span("fetch_ytdlp"):
+        return fetch_youtube_transcript_ytdlp(video_id)
+
+
+# (name, fetch function, prior latency in seconds before any fetch is timed)
+transcript_fetcher = HedgedFetcher([
+    ("youtube_transcript_api", _fetch_with_api, 1.5),
+    ("yt-dlp", _fetch_with_ytdlp, 4.0),
+], TRANSCRIPT_HEDGE_DELAY_SECONDS, neutral_errors=(
+    TranscriptsDisabled, NoTranscriptFound, VideoUnavailable, VideoUnplayable, AgeRestricted, InvalidVideoId,
+))
+
+
+def open_transcript_stream(video_id):
+    """Fetches a caption track through transcript_fetcher and returns it as a
+    TranscriptStream. On total failure re-raises youtube_transcript_api's
+    exception, recording a short-lived negative cache entry first when the
+    video simply has no captions."""
+    try:
+        source, stream = transcript_fetcher.fetch(video_id)
+    except AllSourcesFailed as e:
+        for name, error in e.errors.items():
+            app.logger.warning(f"{name} failed ({type(error).__name__}: {error})")
+        primary_error = e.errors["youtube_transcript_api"]
+        if isinstance(primary_error, TranscriptsDisabled):
+            transcript_cache.set(video_id, {"error": "captions_disabled"}, ttl_seconds=TRANSCRIPT_NEGATIVE_TTL_SECONDS)
+        elif isinstance(primary_error, NoTranscriptFound):
+            transcript_cache.set(video_id, {"error": "no_transcript"}, ttl_seconds=TRANSCRIPT_NEGATIVE_TTL_SECONDS)
+        # Surface youtube_transcript_api's error, since its exception types map
+        # to specific, honest messages — yt-dlp's are just generic failures.
+        raise primary_error
+    app.logger.info(f"Transcript fetched via {source}: {stream.total_chars} chars, source language '{stream.language}'")
+    return stream
+
+
+def _store_transcript(video_id, stream, text):
+    entry = {"text": text, "language": stream.language, "source": stream.source, "translatedByYoutube": stream.translated_by_youtube}
+    transcript_cache.set(video_id, entry)
+    return {**entry, "cached": False}
+
+
+def get_transcript(video_id):
+    """Cache-fronted transcript fetch. Tries the transcript cache first, then
+    open_transcript_stream(). Returns a dict with 'text', 'language',
+    'source' (which extractor produced it), 'translatedByYoutube' and
+    'cached'."""
+    transcript = _cached_transcript(video_id)
+    if transcript is not None:
+        return transcript
+    stream = open_transcript_stream(video_id)
+    return _store_transcript(video_id, stream, "".join(stream))
+
+
+def _summarize_video_job(video_id, progress=_no_progress, on_token=None, include_translation=False, long_form=False, incremental=False):
+    """Body of /summarize-video after URL validation, shared by its
+    synchronous and job modes. Returns (response_body, http_status). A
+    cached transcript goes through summarize_video_pipeline, and so does a
+    freshly fetched one whose source knew its length (it already holds the
+    whole track); one of unknown length is summarized while it is being
+    read (see summarize_transcript_stream). A fetched transcript is cached
+    as soon as it has been read in full, whatever the pipeline then does,
+    so retries and over-limit videos don't go back to YouTube.
+    With long_form, a fresh transcript over MAX_TRANSCRIPT_CHARS goes through
+    summarize_longform_stream instead and is neither cached nor returned.
+    With incremental, the transcript is always fetched fresh and goes
+    through summarize_incremental_stream, up to
+    LONGFORM_MAX_TRANSCRIPT_CHARS (and then not returned) with long_form;
+    refreshes of one video run one at a time (see _refresh_lock)."""
+    if incremental:
+        with _refresh_lock(video_id):
+            return _summarize_video(video_id, progress, on_token, include_translation, long_form, incremental)
+    return _summarize_video(video_id, progress, on_token, include_translation, long_form, incremental)
+
+
+def _summarize_video(video_id, progress, on_token, include_translation, long_form, incremental):
+    try:
+        app.logger.info(f"Fetching transcript for video ID: {video_id}")
+        progress("fetch")
+        # A live transcript grows between refreshes, so a cached copy is stale.
+        transcript = None if incremental else _cached_transcript(video_id)
+        stream = open_transcript_stream(video_id) if transcript is None else None
+    except Exception as e:
+        return _transcript_fetch_error(video_id, e)
+
+    try:
+        app.logger.info("Starting summarization pipeline")
+        if incremental:
+            pipeline_result, transcript_text, transcript_chars = _summarize_incremental(video_id, stream, progress, on_token, long_form)
+            if transcript_text is None:
+                transcript = {"language": stream.language, "source": stream.source, "cached": False}
+            else:
+                transcript = _store_transcript(video_id, stream, transcript_text)
+        elif stream is not None and long_form and (stream.total_chars is None or stream.total_chars > MAX_TRANSCRIPT_CHARS):
+            pipeline_result, transcript_chars = summarize_longform_stream(stream, progress, on_token)
+            transcript_text = None
+            transcript = {"language": stream.language, "source": stream.source, "cached": False}
+        elif stream is not None and stream.total_chars is None:
+            transcript = {}
+            pipeline_result, transcript_text = summarize_transcript_stream(
+                stream, progress, on_token, include_translation,
+                on_text=lambda text: transcript.update(_store_transcript(video_id, stream, text)),
+            )
+            transcript_chars = len(transcript_text)
+        else:
+            if stream is not None:
+                # Chunked by _split_text like a cached copy, so both share
+                # their chunk_cache entries.
+                transcript = _store_transcript(video_id, stream, "".join(stream))
+            transcript_text = transcript["text"]
+            _check_transcript_length(transcript_text)
+            transcript_chars = len(transcript_text)
+            # A track YouTube machine-translated to English is labelled with its
+            # original language, but its text is English.
+            language_hint = "en" if transcript.get("translatedByYoutube") else transcript["language"]
+            pipeline_result = summarize_video_pipeline(transcript_text, progress, on_token, language_hint, include_translation, captions=True)
+        return _video_summary_body(pipeline_result, transcript, transcript_text, transcript_chars), 200
+    except Exception as e:
+        return _video_pipeline_error(e, long_form)
+
+
+def _summarize_incremental(video_id, stream, progress, on_token, long_form):
+    """summarize_incremental_stream, starting video_id over from scratch
+    when its transcript was revised since the last refresh."""
+    limit = LONGFORM_MAX_TRANSCRIPT_CHARS if long_form else MAX_TRANSCRIPT_CHARS
+    try:
+        return summarize_incremental_stream(video_id, stream, progress, on_token, limit, keep_text=not long_form)
+    except TranscriptRevised:
+        app.logger.info(f"Transcript of {video_id} was revised; summarizing it from the start")
+        incremental_states.delete(_incremental_key(video_id))
+        return summarize_incremental_stream(video_id, open_transcript_stream(video_id), progress, on_token, limit, keep_text=not long_form)
+
+
+def _transcript_fetch_error(video_id, e):
+    """Maps a failed transcript fetch to (response_body, http_status)."""
+    if isinstance(e, (TranscriptsDisabled, CachedTranscriptsDisabled)):
+        return {"error": "no_captions", "message": "Captions are disabled for this video, so it can't be summarized."}, 404
+    if isinstance(e, (NoTranscriptFound, CachedNoTranscriptFound)):
+        return {"error": "no_captions", "message": "No captions are available for this video in any language."}, 404
+    if isinstance(e, (VideoUnavailable, VideoUnplayable)):
+        return {"error": "video_unavailable", "message": "This video is unavailable (private, deleted, or region-locked)."}, 400
+    if isinstance(e, AgeRestricted):
+        return {"error": "age_restricted", "message": "This video is age-restricted, and its captions can't be accessed."}, 400
+    if isinstance(e, InvalidVideoId):
+        return {"error": "invalid_url", "message": "That doesn't look like a valid YouTube video ID."}, 400
+    if isinstance(e, (RequestBlocked, IpBlocked)):
+        app.logger.warning(f"YouTube blocked transcript request for {video_id}")
+        return {"error": "rate_limited", "message": "YouTube is temporarily blocking transcript requests from our server. Please try again in a few minutes."}, 503
+    app.logger.error(f"Transcript fetch failed: {str(e)}", exc_info=e)
+    return {"error": "transcript_fetch_failed", "message": f"Transcript fetch failed: {str(e)}"}, 500
+
+
+def _video_summary_body(pipeline_result, transcript, transcript_text, transcript_chars):
+    app.logger.info(f"Summarization completed successfully (cached={pipeline_result['cached']}, chunk cache={pipeline_result['chunkCache']}, reduce levels={pipeline_result['reduceLevels']})")
+    return {
+        "summarizedText": pipeline_result["summary"],
+        "transcription": transcript_text,
+        "transcriptChars": transcript_chars,
+        "longForm": transcript_text is None,
+        "detectedLanguage": pipeline_result["detectedLanguage"],
+        "languageConfidence": pipeline_result["languageConfidence"],
+        "languageDetection": pipeline_result["languageDetection"],
+        "wasTranslated": pipeline_result["wasTranslated"],
+        **_translation_fields(pipeline_result),
+        "captionLanguage": transcript["language"],
+        "transcriptSource": transcript["source"],
+        "transcriptCached": transcript["cached"],
+        "cached": pipeline_result["cached"],
+        "chunkCache": pipeline_result["chunkCache"],
+        "reduceLevels": pipeline_result["reduceLevels"],
+        "precompression": pipeline_result["precompression"],
+        "incremental": pipeline_result["incremental"],
+        "status": "success"
+    }
+
+
+def _video_pipeline_error(e, long_form):
+    """Maps a failed video summarization to (response_body, http_status)."""
+    if isinstance(e, TranscriptTooShort):
+        return {"error": "transcript_too_short", "message": "Transcript too short to summarize"}, 400
+    if isinstance(e, TranscriptTooLong):
+        size = f"{e.chars:,} characters, limit {e.limit:,}" if e.chars is not None else f"more than {e.limit:,} characters"
+        hint = "Try a shorter video or an excerpt." if long_form else 'Try a shorter video or an excerpt, or resend with "longForm": true.'
+        return {
+            "error": "transcript_too_long",
+            "message": f"This video's transcript is too long to summarize in one request ({size}). {hint}"
+        }, 413
+    app.logger.error(f"Summarization pipeline failed: {str(e)}", exc_info=e)
+    return {
+        "error": "summarization_failed",
+        "message": f"Summarization failed: {str(e)}",
+        "status": "error"
+    }, 500
+
+
+def _video_id_from_request(data):
+    """Validates a /summarize-video request body. Returns (video_id, None) on
+    success or (None, (error_body, http_status)) otherwise."""
     if not data or 'videoUrl' not in data:
-        return jsonify({"error": "missing_field", "message": "Missing 'videoUrl' field"}), 400
+        return None, ({"error": "missing_field", "message": "Missing 'videoUrl' field"}, 400)
 
     url = data['videoUrl']
     if not isinstance(url, str) or not validators.url(url):
-        return jsonify({"error": "invalid_url", "message": "Please provide a valid video URL"}), 400
+        return None, ({"error": "invalid_url", "message": "Please provide a valid video URL"}, 400)
 
     video_id = extract_video_id(url)
     if not video_id:
-        return jsonify({"error": "invalid_url", "message": "Could not recognize a YouTube video ID in that URL. Only YouTube links are currently supported."}), 400
+        return None, ({"error": "invalid_url", "message": "Could not recognize a YouTube video ID in that URL. Only YouTube links are currently supported."}, 400)
+    return video_id, None
 
-    try:
-        app.logger.info(f"Fetching transcript for video ID: {video_id}")
-        try:
-            transcript_text, source_lang, _ = fetch_youtube_transcript(video_id)
-            app.logger.info(f"Transcript fetched via youtube_transcript_api: {len(transcript_text)} chars, source language '{source_lang}'")
-        except Exception as primary_error:
-            app.logger.warning(f"youtube_transcript_api failed ({type(primary_error).__name__}: {primary_error}); trying yt-dlp fallback")
+
+@app.route('/summarize-video', methods=['POST'])
+def summarize_video():
+    data = request.get_json(silent=True)
+    video_id, error = _video_id_from_request(data)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    include_translation = bool(data.get("includeTranslation"))
+    long_form = bool(data.get("longForm"))
+    incremental = bool(data.get("incremental"))
+    return _run_or_enqueue(data, "summarize-video", lambda progress: _summarize_video_job(video_id, progress, include_translation=include_translation, long_form=long_form, incremental=incremental))
+
+@app.route('/summarize-video/stream', methods=['POST'])
+def summarize_video_stream():
+    data = request.get_json(silent=True)
+    video_id, error = _video_id_from_request(data)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    include_translation = bool(data.get("includeTranslation"))
+    long_form = bool(data.get("longForm"))
+    incremental = bool(data.get("incremental"))
+    return _sse_response(lambda progress, on_token: _summarize_video_job(video_id, progress, on_token, include_translation, long_form, incremental))
+
+
+# /summarize-batch runs each distinct item (transcript fetch + pipeline) on
+# this pool, which bounds how many transcripts are fetched at once. Their LLM
+# calls go through llm_executor and llm_scheduler like every other request's,
+# so the map chunks of all items share one queue.
+BATCH_MAX_ITEMS = 50
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 8))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix="batch")
+
+
+def _batch_items(data):
+    """Validates a /summarize-batch body, whose "items" list holds
+    {"videoUrl": ...} and/or {"originalText": ...} objects. Returns (items,
+    None) or (None, error_response). A malformed item doesn't reject the
+    batch: it becomes an item carrying its own error response. Items are
+    keyed by video ID or normalized-text hash for deduplication."""
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": "missing_field", "message": "Provide a non-empty 'items' list of {\"videoUrl\": ...} or {\"originalText\": ...} objects"}), 400)
+    if len(items) > BATCH_MAX_ITEMS:
+        return None, (jsonify({"error": "too_many_items", "message": f"A batch can hold at most {BATCH_MAX_ITEMS} items"}), 400)
+
+    parsed = []
+    for index, raw in enumerate(items):
+        item = {"index": index}
+        url = raw.get("videoUrl") if isinstance(raw, dict) else None
+        text = raw.get("originalText") if isinstance(raw, dict) else None
+        if isinstance(url, str) and url:
+            item["type"] = "video"
+            video_id = extract_video_id(url) if validators.url(url) else None
+            if video_id:
+                item.update(videoId=video_id, key=("video", video_id))
+            else:
+                item["error"] = ({"error": "invalid_url", "message": "Could not recognize a YouTube video ID in that URL."}, 400)
+        elif isinstance(text, str) and text.strip():
+            item.update(type="text", originalText=text, key=("text", content_key(_normalize_transcript(text))))
+        else:
+            item.update(type=None, error=({"error": "missing_field", "message": "Each item needs a 'videoUrl' or 'originalText'"}, 400))
+        parsed.append(item)
+    return parsed, None
+
+
+def _batch_item_job(item, include_translation, long_form):
+    if item["type"] == "video":
+        return _summarize_video_job(item["videoId"], include_translation=include_translation, long_form=long_form)
+    return _summarize_text_job(item["originalText"], include_translation=include_translation)
+
+
+def _batch_result(item, body, http_status, duplicate_of=None):
+    result = {"index": item["index"], "type": item["type"]}
+    if "videoId" in item:
+        result["videoId"] = item["videoId"]
+    if duplicate_of is not None:
+        result["duplicateOf"] = duplicate_of
+    return {**result, **body, "httpStatus": http_status}
+
+
+def _start_batch(items, include_translation, long_form):
+    """Submits every distinct valid item to batch_executor and returns an
+    iterator over all items' results (invalid ones first, then each distinct
+    item together with its duplicates as soon as it finishes)."""
+    futures = {}
+    duplicates = {}
+    first_by_key = {}
+    invalid = []
+    for item in items:
+        if "error" in item:
+            invalid.append(item)
+        elif item["key"] in first_by_key:
+            duplicates[first_by_key[item["key"]]["index"]].append(item)
+        else:
+            first_by_key[item["key"]] = item
+            duplicates[item["index"]] = []
+            futures[run_in_context(batch_executor, _batch_item_job, item, include_translation, long_form)] = item
+
+    def results():
+        for item in invalid:
+            yield _batch_result(item, *item["error"])
+        for future in as_completed(futures):
+            item = futures[future]
             try:
-                transcript_text, source_lang = fetch_youtube_transcript_ytdlp(video_id)
-                app.logger.info(f"Transcript fetched via yt-dlp fallback: {len(transcript_text)} chars, source language '{source_lang}'")
-            except Exception as fallback_error:
-                app.logger.warning(f"yt-dlp fallback also failed: {fallback_error}")
-                # Surface the primary source's error, since its exception types map to
-                # specific, honest messages below — yt-dlp's are just generic failures.
-                raise primary_error
-    except TranscriptsDisabled:
-        return jsonify({"error": "no_captions", "message": "Captions are disabled for this video, so it can't be summarized."}), 404
-    except NoTranscriptFound:
-        return jsonify({"error": "no_captions", "message": "No captions are available for this video in any language."}), 404
-    except (VideoUnavailable, VideoUnplayable):
-        return jsonify({"error": "video_unavailable", "message": "This video is unavailable (private, deleted, or region-locked)."}), 400
-    except AgeRestricted:
-        return jsonify({"error": "age_restricted", "message": "This video is age-restricted, and its captions can't be accessed."}), 400
-    except InvalidVideoId:
-        return jsonify({"error": "invalid_url", "message": "That doesn't look like a valid YouTube video ID."}), 400
-    except (RequestBlocked, IpBlocked):
-        app.logger.warning(f"YouTube blocked transcript request for {video_id}")
-        return jsonify({"error": "rate_limited", "message": "YouTube is temporarily blocking transcript requests from our server. Please try again in a few minutes."}), 503
-    except Exception as e:
-        app.logger.error(f"Transcript fetch failed: {str(e)}", exc_info=True)
-        return jsonify({"error": "transcript_fetch_failed", "message": f"Transcript fetch failed: {str(e)}"}), 500
+                body, http_status = future.result()
+            except Exception as e:
+                body, http_status = {"error": str(e), "status": "error"}, 500
+            yield _batch_result(item, body, http_status)
+            for duplicate in duplicates[item["index"]]:
+                yield _batch_result(duplicate, body, http_status, duplicate_of=item["index"])
+    return results()
 
-    if len(transcript_text.strip()) < 50:
-        return jsonify({"error": "transcript_too_short", "message": "Transcript too short to summarize"}), 400
 
-    if len(transcript_text) > MAX_TRANSCRIPT_CHARS:
-        return jsonify({
-            "error": "transcript_too_long",
-            "message": f"This video's transcript is too long to summarize in one request ({len(transcript_text):,} characters, limit {MAX_TRANSCRIPT_CHARS:,}). Try a shorter video or an excerpt."
-        }), 413
+def _batch_counts(results):
+    return {
+        "items": len(results),
+        "succeeded": sum(1 for r in results if r["httpStatus"] < 400),
+        "failed": sum(1 for r in results if r["httpStatus"] >= 400),
+        "duplicates": sum(1 for r in results if "duplicateOf" in r),
+    }
+
+
+def _summarize_batch_job(items, progress=_no_progress, include_translation=False, long_form=False):
+    """Body of /summarize-batch without streaming: every item's result, in
+    request order, plus counts. Returns (response_body, http_status)."""
+    results = []
+    progress("batch", itemsDone=0, itemsTotal=len(items))
+    for result in _start_batch(items, include_translation, long_form):
+        results.append(result)
+        progress("batch", itemsDone=len(results), itemsTotal=len(items))
+    results.sort(key=lambda r: r["index"])
+    return {"results": results, **_batch_counts(results), "status": "success"}, 200
+
+
+@app.route('/summarize-batch', methods=['POST'])
+def summarize_batch():
+    """Summarizes many videos and/or texts in one call. Duplicate items are
+    only summarized once. With "stream": true the response is NDJSON: one
+    line per item result as it finishes, then a final {"done": true, ...}
+    line with counts. Otherwise it behaves like /summarize ("async": true for
+    job mode)."""
+    data = request.get_json(silent=True)
+    items, error_response = _batch_items(data)
+    if error_response:
+        return error_response
+
+    include_translation = bool(data.get("includeTranslation"))
+    long_form = bool(data.get("longForm"))
+    if not data.get("stream"):
+        return _run_or_enqueue(data, "summarize-batch", lambda progress: _summarize_batch_job(items, progress, include_translation, long_form))
+
+    results = _start_batch(items, include_translation, long_form)
+
+    def generate():
+        finished = []
+        for result in results:
+            finished.append(result)
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"done": True, **_batch_counts(finished), "status": "success"}) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+
+# Answers use a higher temperature for more creative responses
+ANSWER_PROMPT = _Prompt(
+    template="""
+        You are a comprehensive AI assistant with access to current information and the ability to perform web searches.
+        Your goal is to provide the most accurate and up-to-date answers possible.
+        
+        CRITICAL INSTRUCTION: NEVER say "the summary doesn't contain this information" or similar phrases.
+        Instead, actively search for and provide the information using your knowledge base and web search capabilities.
+        
+        Guidelines:
+        1. Knowledge Utilization:
+           - First, check if the answer can be found in the provided summary
+           - If not in summary, IMMEDIATELY search your knowledge base and perform a web search
+           - Always provide the most relevant information, regardless of source
+           - Combine information from multiple sources when relevant
+           - Never indicate that information is missing from the summary
+        
+        2. Answer Structure:
+           - Start with the most relevant information (whether from summary or other sources)
+           - Add context and additional details
+           - Include specific facts, dates, and statistics
+           - Provide examples and real-world applications
+           - Use proper formatting for clarity
+        
+        3. Information Gathering:
+           - Actively search for information when not in summary
+           - Use your knowledge base extensively
+           - Perform web searches for recent or specific information
+           - Cross-reference multiple sources
+           - Provide the most up-to-date information available
+        
+        4. Special Cases:
+           - For sports/events: Provide current statistics, results, and player information
+           - For recent events: Include the latest developments
+           - For technical topics: Provide detailed explanations
+           - For opinion-based questions: Offer balanced perspectives
+        
+        5. Always:
+           - Be thorough and detailed in responses
+           - Provide accurate and up-to-date information
+           - Never say information is missing or unavailable
+           - Use clear and professional language
+           - Maintain a helpful and informative tone
+        
+        Summary:
+        {summary}
+        
+        Earlier in this conversation:
+        {history}
+        
+        Question:
+        {question}
+        
+        {format_instructions}
+        """,
+    input_variables=["summary", "history", "question"],
+    output_model=QuestionAnswer,
+)
+
+
+ANSWER_PASSAGES_PROMPT = _Prompt(
+    template="""
+        You are answering a question about a video or document, using its summary and the passages of its transcript that are most relevant to the question.
+
+        Guidelines:
+        - Base the answer on the passages and the summary, preferring the passages for specific details (names, numbers, quotes, what was said when)
+        - If they don't cover the question, answer from your general knowledge and say briefly that the transcript doesn't address it
+        - In "citations", list the numbers of the passages the answer relies on (an empty list if none)
+        - Be clear, accurate and well organised
+
+        Summary:
+        {summary}
+
+        Transcript passages:
+        {passages}
+
+        Earlier in this conversation:
+        {history}
+
+        Question:
+        {question}
 
+        {format_instructions}
+        """,
+    input_variables=["summary", "passages", "history", "question"],
+    output_model=CitedAnswer,
+)
+
+
+# Questions that name their video ("videoUrl") or send the transcript text
+# ("transcription") are answered from the QA_TOP_K transcript passages that
+# best match the question, retrieved from a per-transcript BM25 index on
+# disk, alongside the summary. Details the summary dropped stay reachable,
+# the prompt stays the same size however long the video is, and answers cite
+# the passages (with their character offsets in the transcript) they use.
+QA_PASSAGE_TOKENS = 300
+QA_TOP_K = 6
+passage_index = PassageIndex("passages", max_documents=2000)
+
+
+def _transcript_passages(text):
+    """_split_text's chunks at passage size, as (start_char, end_char,
+    text) with offsets into text."""
+    passages = []
+    cursor = 0
+    for doc in _split_text(text, QA_PASSAGE_TOKENS):
+        piece = doc.page_content
+        start = text.find(piece, cursor)
+        if start < 0:
+            start = cursor
+        passages.append((start, start + len(piece), piece))
+        # Overlapping chunks: the next one starts inside this one.
+        cursor = start + 1
+    return passages
+
+
+def _retrieve_passages(source, question):
+    """Top passages for question from source's index, building the index on
+    first use. A video's index is rebuilt whenever the transcript cached for
+    it has changed since (a live video's grows with every incremental
+    refresh). source is {"key": index_key} plus the transcript's "videoId"
+    or its "text". Returns [] when the text can't be loaded."""
+    key = source["key"]
+    indexed = passage_index.version(key)
     try:
-        app.logger.info("Starting summarization pipeline")
-        pipeline_result = summarize_video_pipeline(transcript_text)
-        app.logger.info("Summarization completed successfully")
-        return jsonify({
-            "summarizedText": pipeline_result["summary"],
-            "transcription": transcript_text,
-            "detectedLanguage": pipeline_result["detectedLanguage"],
-            "wasTranslated": pipeline_result["wasTranslated"],
-            "captionLanguage": source_lang,
-            "status": "success"
-        })
+        if "videoId" not in source:
+            # A text source's key is its content digest; sessions don't keep
+            # the text, only the first question carries it.
+            text = source.get("text") if indexed is None else None
+        else:
+            entry = transcript_cache.get(source["videoId"])
+            text = entry.get("text") if entry is not None else None
+            if text is None and indexed is None:
+                text = get_transcript(source["videoId"])["text"]
     except Exception as e:
-        app.logger.error(f"Summarization pipeline failed: {str(e)}", exc_info=True)
-        return jsonify({
-            "error": "summarization_failed",
-            "message": f"Summarization failed: {str(e)}",
+        app.logger.warning(f"No transcript to index for {key}: {e}")
+        return []
+    if text is not None:
+        version = content_key(text)
+        if version != indexed:
+            with span("index_passages"):
+                passage_index.build(key, _transcript_passages(text), version)
+    with span("retrieve"):
+        return passage_index.search(key, question, QA_TOP_K)
+
+
+def _cited_passages(citations, passages):
+    cited = []
+    for number in citations or []:
+        if isinstance(number, int) and 1 <= number <= len(passages) and number not in (c["passage"] for c in cited):
+            passage = passages[number - 1]
+            cited.append({"passage": number, "startChar": passage["startChar"], "endChar": passage["endChar"], "text": passage["text"]})
+    return cited
+
+
+# Follow-up questions run in a session: the first /answer-question call
+# (summary, plus videoUrl or transcription for retrieval) returns a
+# sessionId, and later calls send just {"sessionId", "question"}. A session
+# keeps the summary, the transcript's index key, the last
+# QA_SESSION_RECENT_TURNS turns verbatim and a digest of older ones (each
+# answer cut to QA_DIGEST_ANSWER_CHARS, the whole digest to
+# QA_SESSION_DIGEST_CHARS), so prompts stay bounded however long the
+# conversation runs. Sessions live in a SqliteCache, so they are LRU-bounded,
+# expire, and are shared by all worker processes.
+QA_SESSION_RECENT_TURNS = 3
+QA_SESSION_DIGEST_CHARS = 1500
+QA_DIGEST_ANSWER_CHARS = 240
+qa_sessions = SqliteCache("qa_sessions", max_entries=10000, ttl_seconds=6 * 3600)
+
+
+def _new_qa_session(summary, source):
+    # Once indexed, a transcript is found by its key; the text isn't kept.
+    stored_source = {k: v for k, v in source.items() if k != "text"} if source else None
+    return {"summary": summary, "source": stored_source, "recent": [], "digest": "", "turns": 0}
+
+
+def _session_history(session):
+    parts = [session["digest"]] if session["digest"] else []
+    parts.extend(f"Q: {turn['question']}\nA: {turn['answer']}" for turn in session["recent"])
+    return "\n\n".join(parts) or "(none, this is the first question)"
+
+
+def _digest_turn(turn):
+    answer = " ".join(turn["answer"].split())
+    if len(answer) > QA_DIGEST_ANSWER_CHARS:
+        answer = answer[:QA_DIGEST_ANSWER_CHARS].rsplit(" ", 1)[0] + "..."
+    return f"Q: {turn['question']} A: {answer}"
+
+
+def _record_turn(session_id, session, question, answer):
+    """Adds the turn to the session as stored now rather than as it was read
+    when the question came in, so questions answered concurrently in one
+    session all keep their turns. session only stands in for a session not
+    stored yet (or expired meanwhile). Returns the updated session."""
+    def add_turn(stored):
+        stored["recent"].append({"question": question, "answer": answer})
+        while len(stored["recent"]) > QA_SESSION_RECENT_TURNS:
+            lines = stored["digest"].split("\n") if stored["digest"] else []
+            lines.append(_digest_turn(stored["recent"].pop(0)))
+            while len(lines) > 1 and len("\n".join(lines)) > QA_SESSION_DIGEST_CHARS:
+                lines.pop(0)
+            stored["digest"] = "\n".join(lines)
+        stored["turns"] += 1
+        return stored
+    return qa_sessions.update(session_id, add_turn, default=session)
+
+
+def _answer_request(session, question, passages):
+    """The chain to answer question with (grounded in passages when there
+    are any) and its inputs."""
+    inputs = {"summary": session["summary"], "history": _session_history(session), "question": question}
+    if not passages:
+        return "answer", inputs
+    inputs["passages"] = "\n\n".join(f"[{n}] {p['text']}" for n, p in enumerate(passages, 1))
+    return "answer_passages", inputs
+
+
+def _answer_body(session_id, session, question, result, source, passages):
+    """Records the answered turn and builds the response body."""
+    session = _record_turn(session_id, session, question, result["answer"])
+    body = {"answer": result["answer"], "sessionId": session_id, "turn": session["turns"]}
+    if source is not None:
+        body["citations"] = _cited_passages(result.get("citations"), passages)
+        body["passagesRetrieved"] = len(passages)
+    return {**body, "status": "success"}
+
+
+def _answer_question_job(session_id, session, question, progress=_no_progress, on_token=None, source=None):
+    """Body of /answer-question, shared by its plain and streaming variants.
+    Answers question within session (see _new_qa_session), records the turn
+    and returns (response_body, http_status). When on_token is given the
+    chain is streamed; JsonOutputParser yields progressively longer partial
+    answers, and only the newly added text is passed to on_token. source
+    overrides the session's transcript reference (it carries the text on a
+    session's first question, to build the index from)."""
+    try:
+        source = source or session["source"]
+        passages = _retrieve_passages(source, question) if source is not None else []
+        chain, inputs = _answer_request(session, question, passages)
+        if on_token is None:
+            result = run_chain(chain, inputs, PRIORITY_INTERACTIVE)
+        else:
+            latest = {"partial": {}, "sent": ""}
+
+            def emit(partial):
+                latest["partial"] = partial
+                answer = partial.get("answer") or ""
+                sent = latest["sent"]
+                if len(answer) > len(sent) and answer.startswith(sent):
+                    on_token(answer[len(sent):])
+                    latest["sent"] = answer
+            stream_chain(chain, inputs, emit, PRIORITY_INTERACTIVE)
+            result = latest["partial"]
+        return _answer_body(session_id, session, question, result, source, passages), 200
+
+    except Exception as e:
+        return {
+            "error": str(e),
             "status": "error"
-        }), 500
+        }, 500
+
+
+def _answer_question_inputs(data):
+    """Validates an /answer-question request body. Returns (session_id,
+    session, question, source, None) or (None, None, None, None,
+    (error_body, http_status)). A live "sessionId" continues that session; otherwise a
+    new one is started from "summary", with "videoUrl" or "transcription"
+    (if given) as the source of transcript passages."""
+    if not data:
+        return None, None, None, None, ({"error": "No JSON data provided"}, 400)
+
+    summary = data.get("summary")
+    question = data.get("question")
+    session_id = data.get("sessionId")
+
+    if session_id and question:
+        session = qa_sessions.get(str(session_id))
+        if session is not None:
+            return str(session_id), session, question, None, None
+        if not summary:
+            return None, None, None, None, ({"error": "session_expired", "message": "This Q&A session has expired. Send the summary again to start a new one."}, 404)
+
+    if not summary or not question:
+        return None, None, None, None, ({"error": "Missing 'summary' or 'question' field"}, 400)
+
+    source = None
+    video_url = data.get("videoUrl")
+    transcription = data.get("transcription")
+    if isinstance(video_url, str) and video_url:
+        video_id = extract_video_id(video_url)
+        if not video_id:
+            return None, None, None, None, ({"error": "invalid_url", "message": "Could not recognize a YouTube video ID in that URL."}, 400)
+        source = {"key": f"video:{video_id}", "videoId": video_id}
+    elif isinstance(transcription, str) and transcription.strip():
+        source = {"key": f"text:{content_key(_normalize_transcript(transcription))}", "text": transcription}
+    return uuid.uuid4().hex, _new_qa_session(summary, source), question, source, None
+
 
 @app.route('/answer-question', methods=['POST'])
 def answer_question():
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No JSON data provided"}), 400
-            
-        summary = data.get("summary")
-        question = data.get("question")
-        
-        if not summary or not question:
-            return jsonify({"error": "Missing 'summary' or 'question' field"}), 400
+        session_id, session, question, source, error = _answer_question_inputs(request.get_json())
+        if error:
+            return jsonify(error[0]), error[1]
 
-        # Using a more capable model with higher temperature for more creative responses
-        llm = ChatGroq(model=GROQ_MODEL, temperature=0.9)
-        parser = JsonOutputParser(pydantic_object=QuestionAnswer)
-        
-        prompt = PromptTemplate(
-            template="""
-            You are a comprehensive AI assistant with access to current information and the ability to perform web searches.
-            Your goal is to provide the most accurate and up-to-date answers possible.
-            
-            CRITICAL INSTRUCTION: NEVER say "the summary doesn't contain this information" or similar phrases.
-            Instead, actively search for and provide the information using your knowledge base and web search capabilities.
+        job_fn = _traced(lambda progress: _answer_question_job(session_id, session, question, progress, source=source), _wants_timings())
+        body, http_status = job_fn(_no_progress)
+        return jsonify(body), http_status
+
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
+@app.route('/answer-question/stream', methods=['POST'])
+def answer_question_stream():
+    session_id, session, question, source, error = _answer_question_inputs(request.get_json(silent=True))
+    if error:
+        return jsonify(error[0]), error[1]
+
+    return _sse_response(lambda progress, on_token: _answer_question_job(session_id, session, question, progress, on_token, source))
+
+
+# /detect-fake-news checks a text claim by claim: the factual claims are
+# extracted from CLAIM_CHUNK_TOKENS chunks in parallel, normalized and
+# deduplicated by hash, and each one not already in verdict_cache is verified
+# by its own short LLM call (all through llm_scheduler). The per-claim
+# verdicts are then aggregated into a FakeNewsAnalysis. Long transcripts no
+# longer overflow one prompt, and widely shared stories, whose articles
+# repeat the same claims, are mostly answered from the cache. Verdicts
+# expire, since what is known about recent events changes.
+CLAIM_CHUNK_TOKENS = 2000
+MAX_CLAIMS_PER_CHUNK = 8
+MAX_CLAIMS = 30
+verdict_cache = SqliteCache("verdicts", max_entries=100000, ttl_seconds=3 * 24 * 3600)
+CLAIM_VERDICTS = ("supported", "false", "disputed", "unverifiable")
+# Content is only called fake when at least this share of its checkable
+# claims are judged false with at least FAKE_MIN_CONFIDENCE.
+FAKE_FALSE_SHARE = 0.3
+FAKE_MIN_CONFIDENCE = 0.8
+MAX_REASONS = 8
+MAX_SUGGESTIONS = 4
+
+CLAIMS_PROMPT = _Prompt(
+    template="""
+            You are preparing a news text for fact-checking. Extract the factual claims it makes: specific, checkable statements about events, people, numbers, dates, places or causes.
             
             Guidelines:
-            1. Knowledge Utilization:
-               - First, check if the answer can be found in the provided summary
-               - If not in summary, IMMEDIATELY search your knowledge base and perform a web search
-               - Always provide the most relevant information, regardless of source
-               - Combine information from multiple sources when relevant
-               - Never indicate that information is missing from the summary
-            
-            2. Answer Structure:
-               - Start with the most relevant information (whether from summary or other sources)
-               - Add context and additional details
-               - Include specific facts, dates, and statistics
-               - Provide examples and real-world applications
-               - Use proper formatting for clarity
+            - Make each claim self-contained: resolve pronouns and include the subject, date or place the text gives
+            - One fact per claim, stated neutrally in a single sentence
+            - Skip opinions, analysis, predictions, questions and rhetoric
+            - At most {max_claims} claims, most important first; an empty list if there are none
             
-            3. Information Gathering:
-               - Actively search for information when not in summary
-               - Use your knowledge base extensively
-               - Perform web searches for recent or specific information
-               - Cross-reference multiple sources
-               - Provide the most up-to-date information available
+            Text to extract claims from:
+            {text}
             
-            4. Special Cases:
-               - For sports/events: Provide current statistics, results, and player information
-               - For recent events: Include the latest developments
-               - For technical topics: Provide detailed explanations
-               - For opinion-based questions: Offer balanced perspectives
+            {format_instructions}
+            """,
+    input_variables=["text", "max_claims"],
+    output_model=ClaimList,
+)
+
+VERIFY_PROMPT = _Prompt(
+    template="""
+            You are an expert fact-checker with access to current information up to April 2025. Judge the single factual claim below.
             
-            5. Always:
-               - Be thorough and detailed in responses
-               - Provide accurate and up-to-date information
-               - Never say information is missing or unavailable
-               - Use clear and professional language
-               - Maintain a helpful and informative tone
+            Verdicts:
+            - "supported": consistent with established facts, official statements or credible reporting
+            - "false": clearly contradicts established facts, with overwhelming evidence
+            - "disputed": credible sources disagree, or the claim is misleading without context
+            - "unverifiable": too recent, too obscure or too vague to check
             
-            Summary:
-            {summary}
+            Be extremely conservative: prefer "unverifiable" or "disputed" over "false" unless the evidence of fabrication is overwhelming. Breaking news may be incomplete, and developments after your knowledge cutoff are possible.
             
-            Question:
-            {question}
+            Claim to verify:
+            {claim}
             
             {format_instructions}
             """,
-            input_variables=["summary", "question"],
-            partial_variables={
-                "format_instructions": parser.get_format_instructions()
-            },
-        )
-        
-        chain = prompt | llm | parser
-        result = chain.invoke({"summary": summary, "question": question})
-        
-        return jsonify({
-            "answer": result["answer"],
-            "status": "success"
-        })
+    input_variables=["claim"],
+    output_model=ClaimVerdict,
+)
+
+
+def _normalize_claim(claim):
+    return " ".join(claim.lower().split()).strip(" .!?;:\"'")
+
+
+def _claim_key(claim):
+    return content_key("claim", _normalize_claim(claim), GROQ_MODEL, VERIFY_PROMPT_VERSION)
+
+
+def _chunk_claims_key(doc):
+    return content_key("claims", GROQ_MODEL, CLAIMS_PROMPT_VERSION, MAX_CLAIMS_PER_CHUNK, doc.page_content)
+
+
+def _chunk_claims_inputs(doc):
+    return {"text": doc.page_content, "max_claims": MAX_CLAIMS_PER_CHUNK}
+
+
+def _store_chunk_claims(doc, result):
+    claims = [c.strip() for c in result.get("claims") or [] if isinstance(c, str) and c.strip()][:MAX_CLAIMS_PER_CHUNK]
+    chunk_cache.set(_chunk_claims_key(doc), claims)
+    return claims
+
+
+def _extract_chunk_claims(doc):
+    cached = chunk_cache.get(_chunk_claims_key(doc))
+    if cached is not None:
+        return cached
+    return _store_chunk_claims(doc, run_chain("extract_claims", _chunk_claims_inputs(doc), PRIORITY_INTERACTIVE))
+
+
+def _extract_claims(text):
+    """Distinct claims in text, in order of appearance, as (claim_key,
+    claim) pairs, at most MAX_CLAIMS. A chunk whose extraction fails
+    contributes none; if every chunk fails the first error is raised."""
+    documents = _split_text(text, CLAIM_CHUNK_TOKENS)
+    futures = [_submit(_extract_chunk_claims, doc) for doc in documents]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    return _distinct_claims(outcomes)
+
+
+def _distinct_claims(outcomes):
+    """Merges per-chunk extraction outcomes (a claim list, or the exception
+    the chunk failed with) as _extract_claims describes."""
+    claims = {}
+    errors = []
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            _record_fallback("extract_claims")
+            errors.append(outcome)
+            continue
+        for claim in outcome:
+            claims.setdefault(_claim_key(claim), claim)
+    if errors and len(errors) == len(outcomes):
+        raise errors[0]
+    return list(claims.items())[:MAX_CLAIMS]
+
+
+def _verify_claim(key, claim):
+    return _store_verdict(key, run_chain("verify_claim", {"claim": claim}, PRIORITY_INTERACTIVE))
+
+
+def _store_verdict(key, result):
+    verdict = str(result.get("verdict", "")).strip().lower()
+    try:
+        confidence = min(1.0, max(0.0, float(result.get("confidence", 0.5))))
+    except (TypeError, ValueError):
+        confidence = 0.5
+    checked = {
+        "verdict": verdict if verdict in CLAIM_VERDICTS else "unverifiable",
+        "confidence": confidence,
+        "reason": str(result.get("reason", "")).strip(),
+    }
+    verdict_cache.set(key, checked)
+    return checked
+
+
+def _check_claims(claims, claim_stats):
+    """Verdicts for (claim_key, claim) pairs, from verdict_cache where
+    possible and otherwise verified concurrently. A claim that can't be
+    verified counts as unverifiable (and isn't cached)."""
+    checked, pending = _cached_verdicts(claims, claim_stats)
+    futures = [_submit(_verify_claim, key, claim) for _, key, claim in pending]
+    for (i, _, claim), future in zip(pending, futures):
+        try:
+            checked[i] = {"claim": claim, **future.result(), "cached": False}
+        except Exception:
+            checked[i] = _unchecked_claim(claim)
+    return checked
+
+
+def _cached_verdicts(claims, claim_stats):
+    """Verdicts for claims from verdict_cache, with None for the misses, plus
+    the (index, claim_key, claim) triples still to verify."""
+    checked = [None] * len(claims)
+    pending = []
+    for i, (key, claim) in enumerate(claims):
+        cached = verdict_cache.get(key)
+        _record_chunk_hits(claim_stats, [cached is not None])
+        if cached is not None:
+            checked[i] = {"claim": claim, **cached, "cached": True}
+        else:
+            pending.append((i, key, claim))
+    return checked, pending
+
+
+def _unchecked_claim(claim):
+    _record_fallback("verify_claim")
+    return {"claim": claim, "verdict": "unverifiable", "confidence": 0.0, "reason": "The claim could not be checked.", "cached": False}
+
+
+def _aggregate_verdicts(verdicts):
+    """Folds per-claim verdicts into a FakeNewsAnalysis dict."""
+    checkable = [v for v in verdicts if v["verdict"] != "unverifiable"]
+    false = [v for v in checkable if v["verdict"] == "false" and v["confidence"] >= FAKE_MIN_CONFIDENCE]
+    is_fake = bool(checkable) and len(false) / len(checkable) >= FAKE_FALSE_SHARE
+    if is_fake:
+        confidence = sum(v["confidence"] for v in false) / len(false)
+    else:
+        supported = [v for v in checkable if v["verdict"] == "supported"]
+        confidence = sum(v["confidence"] for v in supported) / len(supported) if supported else 0.3
+
+    order = {"false": 0, "disputed": 1, "supported": 2, "unverifiable": 3}
+    ranked = sorted(verdicts, key=lambda v: order[v["verdict"]])
+    reasons = [f"{v['claim']} ({v['verdict']}): {v['reason']}" for v in ranked[:MAX_REASONS]]
+    if not verdicts:
+        reasons = ["No specific factual claims were found to check; the content is mostly opinion or commentary."]
+    suggestions = [f"Check against primary sources: {v['claim']}" for v in ranked if v["verdict"] != "supported"][:MAX_SUGGESTIONS]
+    suggestions.append("Cross-check the key claims with established news organizations.")
+    return FakeNewsAnalysis(is_fake=is_fake, confidence=round(confidence, 3), reasons=reasons, suggestions=suggestions).model_dump()
+
+
+def _fake_news_body(verdicts, claim_stats):
+    return {
+        "analysis": _aggregate_verdicts(verdicts),
+        "claims": verdicts,
+        "claimCache": _chunk_stats_summary(claim_stats),
+        "status": "success"
+    }
 
-    except Exception as e:
-        return jsonify({
-            "error": str(e),
-            "status": "error"
-        }), 500
 
 @app.route('/detect-fake-news', methods=['POST'])
 def detect_fake_news():
@@ -536,110 +3204,17 @@ def detect_fake_news():
         if not text:
             return jsonify({"error": "Missing 'text' field"}), 400
 
-        llm = ChatGroq(model=GROQ_MODEL, temperature=0.3)
-        parser = JsonOutputParser(pydantic_object=FakeNewsAnalysis)
-        
-        prompt = PromptTemplate(
-            template="""
-            You are an expert fact-checker and fake news detector with access to current information up to April 2025. 
-            Analyze the following news content and determine if it's likely fake or not.
-            
-            IMPORTANT: Be extremely conservative in labeling content as fake. Only label as fake if there is overwhelming evidence.
-            
-            Guidelines:
-            1. Source Evaluation (Most Important):
-               - Content from established news organizations is presumed credible unless proven otherwise
-               - YouTube channels with large followings and good reputation are generally credible
-               - Consider the channel's history of accuracy and reliability
-               - Look for official partnerships or affiliations with credible organizations
-               - Check if the content creator has relevant expertise or credentials
-            
-            2. Content Analysis Framework:
-               a) Fact Verification:
-                  - Separate facts from opinions
-                  - Verify only factual claims, not opinions or analysis
-                  - Look for specific, verifiable information
-                  - Check dates, numbers, and specific claims
-               
-               b) Context Understanding:
-                  - Consider the content's purpose (news, analysis, opinion)
-                  - Understand the target audience
-                  - Consider cultural and regional context
-                  - Account for different reporting styles
-            
-            3. Verification Standards:
-               - Require multiple independent sources for fake news claims
-               - Official statements or documents are strong evidence
-               - Expert consensus is important for technical claims
-               - Historical context matters for current events
-               - Consider the possibility of new information
-            
-            4. Red Flags (Require Multiple to Consider Fake):
-               - Clear contradictions with established facts
-               - Proven manipulation of images or videos
-               - Demonstrated history of spreading misinformation
-               - Lack of any credible sources
-               - Clear evidence of fabrication
-            
-            5. Confidence Levels:
-               - Very High (0.9-1.0): Multiple independent verifications, official documentation
-               - High (0.7-0.8): Strong evidence from credible sources
-               - Medium (0.5-0.6): Some verification possible
-               - Low (0.3-0.4): Limited verification, mostly opinions
-               - Very Low (0.0-0.2): Speculative content
-            
-            6. Special Considerations:
-               - Breaking news may have incomplete information
-               - Different perspectives don't necessarily mean fake news
-               - Opinions and analysis are not fake news
-               - Consider the possibility of new developments
-               - Account for different reporting styles
-            
-            7. Output Requirements:
-               a) Determination:
-                  - Only label as fake with overwhelming evidence
-                  - Consider "unverified" instead of "fake" when uncertain
-                  - Acknowledge limitations in verification
-               
-               b) Evidence:
-                  - Provide specific examples of false claims
-                  - Reference credible sources for verification
-                  - Explain the verification process
-                  - Note any uncertainties
-            
-            8. Final Checks:
-               - Is there overwhelming evidence of fabrication?
-               - Are multiple independent sources confirming the falsehood?
-               - Is this a matter of opinion rather than fact?
-               - Could this be new information not yet widely known?
-               - Is the source generally credible?
-            
-            News content:
-            {text}
-            
-            {format_instructions}
-            """,
-            input_variables=["text"],
-            partial_variables={
-                "format_instructions": parser.get_format_instructions()
-            },
-        )
+        claim_stats = _new_chunk_stats()
+        with request_trace() as trace:
+            with span("extract_claims"):
+                claims = _extract_claims(text)
+            with span("verify_claims"):
+                verdicts = _check_claims(claims, claim_stats)
         
-        chain = prompt | llm | parser
-        result = chain.invoke({"text": text})
-        
-        # Additional validation of the result
-        if result.get("is_fake", False):
-            # Require higher confidence for fake news claims
-            if result.get("confidence", 0) < 0.8:
-                result["is_fake"] = False
-                result["confidence"] = 1 - result["confidence"]
-                result["reasons"] = ["Content could not be verified as fake with sufficient confidence"]
-        
-        return jsonify({
-            "analysis": result,
-            "status": "success"
-        })
+        body = _fake_news_body(verdicts, claim_stats)
+        if data.get("includeTimings"):
+            body["timings"] = trace.summary()
+        return jsonify(body)
 
     except Exception as e:
         return jsonify({
@@ -0,0 +1,524 @@
+import asyncio
+import json
+import os
+import time
+
+from app import (
+    CLAIM_CHUNK_TOKENS,
+    CORS_ORIGINS,
+    GROQ_MAX_CONCURRENCY,
+    HTTP_SECONDS,
+    LANGUAGE_DETECTIONS,
+    LOCAL_LANGUAGE_MIN_CONFIDENCE,
+    MAX_REDUCE_ROUNDS,
+    REDUCE_TARGET_CHARS,
+    TRANSLATE_CHUNK_TOKENS,
+    _ChunkProgress,
+    _MapPhase,
+    _ReduceTree,
+    _answer_body,
+    _answer_question_inputs,
+    _answer_request,
+    _cached_pipeline_result,
+    _cached_verdicts,
+    _check_transcript_length,
+    _chunk_claims_inputs,
+    _chunk_claims_key,
+    _distinct_claims,
+    _fake_news_body,
+    _finish_pipeline,
+    _groq_async_http_client,
+    _is_english,
+    _language_sample,
+    _map_chunk_key,
+    _new_chunk_stats,
+    _no_progress,
+    _planned_reduce_levels,
+    _precompress,
+    _record_chunk_hits,
+    _record_fallback,
+    _reduce_request,
+    _retrieve_passages,
+    _split_text,
+    _store_chunk_claims,
+    _store_verdict,
+    _summarize_video_job,
+    _summary_cache_key,
+    _text_summary_body,
+    _transcript_fetch_error,
+    _translate_chunk_key,
+    _translation_mode,
+    _unchecked_claim,
+    _video_id_from_request,
+    _video_pipeline_error,
+    _video_summary_body,
+    _validate_batch,
+    _validated_summary,
+    arun_chain,
+    chunk_cache,
+    get_transcript,
+    span,
+    summary_cache,
+)
+from language_detect import detect_language
+from llm_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE
+from metrics import registry, request_trace
+
+# Async serving mode for the LLM-bound endpoints (/summarize,
+# /summarize-video, /answer-question, /detect-fake-news), as a plain ASGI
+# application:
+#
+#     cd backend && uvicorn asgi:application --workers 1
+#
+# Under Flask every in-flight request parks a thread on blocking LLM calls;
+# here a request is a coroutine and its chunk fan-out is asyncio tasks
+# awaiting the chains' ainvoke(), so one worker process holds hundreds of
+# concurrent summarizations. Response bodies, caches and llm_scheduler's
+# admission control are the same as app.py's, since this imports its
+# pipeline pieces. Job mode ("async": true), the SSE /stream variants and
+# everything else stay on the Flask app; route these four POST paths here.
+# The caches are SQLite files behind a lock and a busy timeout, so every
+# read and write of them runs on a worker thread (asyncio.to_thread), never
+# on the loop.
+#
+# ASYNC_FANOUT_PER_REQUEST bounds how many of one request's LLM calls may be
+# queued on llm_scheduler at once. It's per request rather than process-wide
+# because admission order across requests (a question before a long video's
+# map chunks) is the scheduler's job, and one shared semaphore in front of
+# it would be first-come first-served.
+ASYNC_FANOUT_PER_REQUEST = int(os.environ.get("ASYNC_FANOUT_PER_REQUEST", GROQ_MAX_CONCURRENCY))
+
+# The event loop only keeps weak references to tasks, so fan-out tasks that
+# nothing awaits yet are held here until they finish.
+_background_tasks = set()
+
+
+def _spawn(coro):
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class _AsyncMapPhase(_MapPhase):
+    """_MapPhase on the event loop: chunks resolve asyncio futures, and each
+    batch or single chunk is a task whose LLM call takes a slot in limit
+    (an asyncio.Semaphore) before queueing on llm_scheduler. chunk_cache is
+    read for every chunk in one worker-thread trip (aadd_all), and new
+    summaries are held until aflush_cache() writes them in one transaction."""
+
+    def __init__(self, limit, chunk_stats=None, tick=lambda: None, source_language=None):
+        super().__init__(chunk_stats, tick, source_language)
+        self.limit = limit
+        self.cache_writes = []
+
+    async def aadd_all(self, docs):
+        keys = [_map_chunk_key(doc, self.source_language) for doc in docs]
+        entries = await asyncio.to_thread(lambda: [chunk_cache.get(key) for key in keys])
+        for doc, entry in zip(docs, entries):
+            self._add(doc, entry)
+
+    def _cache_result(self, chunk, result):
+        self.cache_writes.append((_map_chunk_key(chunk, self.source_language), result))
+
+    async def aflush_cache(self):
+        writes, self.cache_writes = self.cache_writes, []
+        try:
+            await asyncio.to_thread(chunk_cache.set_many, writes)
+        except Exception:
+            pass
+
+    def _new_future(self):
+        return asyncio.get_running_loop().create_future()
+
+    def _flush(self):
+        batch, self.batch, self.batch_tokens = self.batch, [], 0
+        _spawn(self._asummarize_chunk(*batch[0]) if len(batch) == 1 else self._asummarize_batch(batch))
+
+    async def _asummarize_chunk(self, i, chunk):
+        try:
+            async with self.limit:
+                result = _validated_summary(await arun_chain(self.single_chain, self._chunk_inputs(chunk), PRIORITY_BULK))
+        except Exception:
+            result = None
+        self._chunk_done(i, chunk, result)
+
+    async def _asummarize_batch(self, batch):
+        try:
+            async with self.limit:
+                parsed = await arun_chain(self.batch_chain, self._batch_inputs(batch), PRIORITY_BULK)
+            summaries = _validate_batch(parsed, batch)
+        except Exception:
+            summaries = {}
+        for i, doc in self._batch_done(batch, summaries):
+            _spawn(self._asummarize_chunk(i, doc))
+
+
+async def _amerge_summaries(summaries, limit):
+    """_merge_summaries through arun_chain."""
+    result = {"summary": " ".join(summaries)}
+    if len(summaries) > 1:
+        joined, key = _reduce_request(summaries)
+        try:
+            cached = _validated_summary(await asyncio.to_thread(chunk_cache.get, key))
+            if cached is not None:
+                result = cached
+            else:
+                async with limit:
+                    merged = _validated_summary(await arun_chain("reduce", {"partial_summaries": joined}, PRIORITY_BULK))
+                if merged is None:
+                    raise ValueError("reduce returned no summary")
+                result = merged
+                try:
+                    await asyncio.to_thread(chunk_cache.set, key, merged)
+                except Exception:
+                    pass
+        except Exception:
+            _record_fallback("reduce")
+    return result
+
+
+class _AsyncReduceTree(_ReduceTree):
+    """_ReduceTree whose nodes are asyncio tasks: each merge awaits its
+    children and then makes one reduce call."""
+
+    def __init__(self, leaves, progress, limit):
+        self.limit = limit
+        super().__init__(leaves, progress)
+
+    def _merge_when_ready(self, group, level):
+        return _spawn(self._amerge(group, level))
+
+    async def _amerge(self, group, level):
+        await asyncio.wait(group)
+        self._level_started(level)
+        return await _amerge_summaries([child.result()["summary"] for child in group], self.limit)
+
+
+async def _atree_reduce(leaves, progress, limit):
+    """_tree_reduce over the async map phase's leaf futures."""
+    tree = _AsyncReduceTree(leaves, progress, limit)
+    for _ in range(_planned_reduce_levels(len(leaves))):
+        tree.add_level()
+    await asyncio.wait(tree.levels[-1])
+    top = tree.top_summaries()
+    while (
+        len(top) > 1
+        and len(" ".join(top)) > REDUCE_TARGET_CHARS
+        and len(tree.levels) - 1 < MAX_REDUCE_ROUNDS
+    ):
+        tree.add_level()
+        await asyncio.wait(tree.levels[-1])
+        top = tree.top_summaries()
+    return " ".join(top), tree.level_timings()
+
+
+async def _atranslate_to_english(text, source_language, limit, chunk_stats=None, progress=_no_progress):
+    """_translate_to_english with the chunks gathered on the event loop."""
+    async def translate_chunk(doc):
+        key = _translate_chunk_key(doc, source_language)
+        cached = await asyncio.to_thread(chunk_cache.get, key)
+        if cached is not None:
+            tick()
+            return cached, True
+        try:
+            async with limit:
+                translated = (await arun_chain("translate", {"text": doc.page_content, "language": source_language}, PRIORITY_BULK)).content
+        except Exception:
+            _record_fallback("translate")
+            tick()
+            return doc.page_content, False
+        await asyncio.to_thread(chunk_cache.set, key, translated)
+        tick()
+        return translated, False
+
+    docs = _split_text(text, chunk_tokens=TRANSLATE_CHUNK_TOKENS, overlap_tokens=0)
+    tick = _ChunkProgress(progress, "translate", len(docs))
+    results = await asyncio.gather(*(translate_chunk(doc) for doc in docs))
+    _record_chunk_hits(chunk_stats, (hit for _, hit in results))
+    return " ".join(part for part, _ in results)
+
+
+async def _adetect_language(text, language_hint=None):
+    sample = _language_sample(text)
+    language, confidence, method = detect_language(sample, language_hint)
+    if language is None or confidence < LOCAL_LANGUAGE_MIN_CONFIDENCE:
+        language = (await arun_chain("detect", {"text": sample})).content.strip()
+        confidence, method = None, "llm"
+    LANGUAGE_DETECTIONS.inc(method=method)
+    return language, confidence, method
+
+
+async def asummarize_video_pipeline(original_text, language_hint=None, include_translation=False, progress=_no_progress, captions=False):
+    """summarize_video_pipeline on the event loop, with the same caching and
+    result. Precompression is CPU-bound, so it runs on a worker thread. The
+    formatted summary isn't streamed."""
+    if not original_text or not original_text.strip():
+        raise ValueError("Empty input text provided")
+
+    cache_key = _summary_cache_key(original_text, include_translation, captions)
+    cached = await asyncio.to_thread(summary_cache.get, cache_key)
+    if cached is not None:
+        return _cached_pipeline_result(cached, None)
+
+    limit = asyncio.Semaphore(ASYNC_FANOUT_PER_REQUEST)
+    chunk_stats = _new_chunk_stats()
+    progress("detect")
+    with span("detect"):
+        language = await _adetect_language(original_text, language_hint)
+    detected_language = language[0]
+    precompression = None
+    if captions:
+        original_text, precompression = await asyncio.to_thread(_precompress, original_text, detected_language, include_translation)
+
+    translation_mode = None
+    translated_text = None
+    map_language = None
+    if not _is_english(detected_language):
+        translation_mode = _translation_mode(original_text, include_translation)
+        if translation_mode == "full":
+            with span("translate"):
+                original_text = await _atranslate_to_english(original_text, detected_language, limit, chunk_stats, progress)
+            if include_translation:
+                translated_text = original_text
+        else:
+            map_language = detected_language
+
+    documents = _split_text(original_text)
+    if not documents:
+        raise ValueError("No documents created after splitting")
+    progress("map", round=0, maxRounds=MAX_REDUCE_ROUNDS)
+    with span("map_reduce"):
+        phase = _AsyncMapPhase(limit, chunk_stats, _ChunkProgress(progress, "map", len(documents)), map_language)
+        await phase.aadd_all(documents)
+        try:
+            final_combined_summary, reduce_levels = await _atree_reduce(phase.finish(), progress, limit)
+        finally:
+            await phase.aflush_cache()
+
+    progress("format")
+    with span("format"):
+        final_html = (await arun_chain("format", {"input": final_combined_summary})).content
+    return await asyncio.to_thread(_finish_pipeline, cache_key, final_html, language, translation_mode, translated_text, chunk_stats, reduce_levels, precompression)
+
+
+async def _asummarize_video_job(video_id, include_translation=False, long_form=False, incremental=False):
+    """_summarize_video_job for the event loop. The transcript fetch is
+    blocking library code, so it runs on a worker thread, as do the
+    disk-backed long-form and incremental pipelines, which read their
+    transcript as a stream."""
+    if long_form or incremental:
+        return await asyncio.to_thread(_summarize_video_job, video_id, include_translation=include_translation, long_form=long_form, incremental=incremental)
+    try:
+        transcript = await asyncio.to_thread(get_transcript, video_id)
+    except Exception as e:
+        return _transcript_fetch_error(video_id, e)
+    try:
+        transcript_text = transcript["text"]
+        _check_transcript_length(transcript_text)
+        # A track YouTube machine-translated to English is labelled with its
+        # original language, but its text is English.
+        language_hint = "en" if transcript.get("translatedByYoutube") else transcript["language"]
+        pipeline_result = await asummarize_video_pipeline(transcript_text, language_hint, include_translation, captions=True)
+        return _video_summary_body(pipeline_result, transcript, transcript_text, len(transcript_text)), 200
+    except Exception as e:
+        return _video_pipeline_error(e, long_form)
+
+
+async def _aanswer_question_job(session_id, session, question, source=None):
+    """_answer_question_job without streaming. Retrieval (SQLite, and a
+    transcript fetch on a session's first question) and recording the turn
+    run on worker threads."""
+    try:
+        source = source or session["source"]
+        passages = await asyncio.to_thread(_retrieve_passages, source, question) if source is not None else []
+        chain, inputs = _answer_request(session, question, passages)
+        result = await arun_chain(chain, inputs, PRIORITY_INTERACTIVE)
+        return await asyncio.to_thread(_answer_body, session_id, session, question, result, source, passages), 200
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
+        }, 500
+
+
+async def adetect_fake_news(text):
+    """Claim extraction and verification for /detect-fake-news, with each
+    stage's calls gathered on the event loop. Returns the response body."""
+    limit = asyncio.Semaphore(ASYNC_FANOUT_PER_REQUEST)
+
+    async def extract(doc):
+        cached = await asyncio.to_thread(chunk_cache.get, _chunk_claims_key(doc))
+        if cached is not None:
+            return cached
+        try:
+            async with limit:
+                result = await arun_chain("extract_claims", _chunk_claims_inputs(doc), PRIORITY_INTERACTIVE)
+            return await asyncio.to_thread(_store_chunk_claims, doc, result)
+        except Exception as e:
+            return e
+
+    async def verify(key, claim):
+        try:
+            async with limit:
+                result = await arun_chain("verify_claim", {"claim": claim}, PRIORITY_INTERACTIVE)
+            return {"claim": claim, **(await asyncio.to_thread(_store_verdict, key, result)), "cached": False}
+        except Exception:
+            return _unchecked_claim(claim)
+
+    claim_stats = _new_chunk_stats()
+    with span("extract_claims"):
+        outcomes = await asyncio.gather(*(extract(doc) for doc in _split_text(text, CLAIM_CHUNK_TOKENS)))
+        claims = _distinct_claims(outcomes)
+    with span("verify_claims"):
+        verdicts, pending = await asyncio.to_thread(_cached_verdicts, claims, claim_stats)
+        checked = await asyncio.gather(*(verify(key, claim) for _, key, claim in pending))
+        for (i, _, _), verdict in zip(pending, checked):
+            verdicts[i] = verdict
+    return _fake_news_body(verdicts, claim_stats)
+
+
+_JOB_MODE_UNSUPPORTED = ({
+    "error": "job_mode_unsupported",
+    "message": 'Job mode ("async": true) is served by the Flask app, not the async endpoints.',
+    "status": "error"
+}, 400)
+
+
+async def summarize(data):
+    if not data:
+        return {"error": "No JSON data provided"}, 400
+    original_text = data.get("originalText")
+    if not original_text:
+        return {"error": "Missing 'originalText' field"}, 400
+    if data.get("async"):
+        return _JOB_MODE_UNSUPPORTED
+    try:
+        pipeline_result = await asummarize_video_pipeline(original_text, include_translation=bool(data.get("includeTranslation")))
+        return _text_summary_body(pipeline_result), 200
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
+        }, 500
+
+
+async def summarize_video(data):
+    video_id, error = _video_id_from_request(data)
+    if error:
+        return error
+    if data.get("async"):
+        return _JOB_MODE_UNSUPPORTED
+    return await _asummarize_video_job(video_id, bool(data.get("includeTranslation")), bool(data.get("longForm")), bool(data.get("incremental")))
+
+
+async def answer_question(data):
+    session_id, session, question, source, error = await asyncio.to_thread(_answer_question_inputs, data)
+    if error:
+        return error
+    return await _aanswer_question_job(session_id, session, question, source)
+
+
+async def detect_fake_news(data):
+    if not data:
+        return {"error": "No JSON data provided"}, 400
+    text = data.get("text")
+    if not text:
+        return {"error": "Missing 'text' field"}, 400
+    try:
+        return await adetect_fake_news(text), 200
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
+        }, 500
+
+
+ROUTES = {
+    "/summarize": summarize,
+    "/summarize-video": summarize_video,
+    "/answer-question": answer_question,
+    "/detect-fake-news": detect_fake_news,
+}
+
+
+async def _read_json(receive):
+    """The request body parsed as a JSON object, or None."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body.extend(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _cors_headers(scope):
+    origin = dict(scope["headers"]).get(b"origin", b"").decode("latin-1")
+    if origin not in CORS_ORIGINS:
+        return []
+    return [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+
+
+async def _send(send, status, body, content_type, extra_headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *extra_headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await _groq_async_http_client.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    started = time.monotonic()
+    path, method = scope["path"], scope["method"]
+    cors = _cors_headers(scope)
+    handler = ROUTES.get(path)
+    endpoint = handler.__name__ if handler is not None else "unknown"
+    if method == "OPTIONS" and handler is not None:
+        status = 204
+        await _send(send, status, b"", b"text/plain", [
+            *cors,
+            (b"access-control-allow-methods", b"POST, OPTIONS"),
+            (b"access-control-allow-headers", b"Content-Type"),
+        ])
+    elif method == "GET" and path == "/metrics":
+        endpoint, status = "metrics", 200
+        await _send(send, status, registry.render().encode(), b"text/plain; version=0.0.4")
+    elif method == "GET" and path == "/":
+        endpoint, status = "home", 200
+        await _send(send, status, b"ASGI app is running!", b"text/plain")
+    else:
+        if handler is None:
+            body, status = {"error": "not_found", "message": f"No async endpoint at {path}"}, 404
+        elif method != "POST":
+            body, status = {"error": "method_not_allowed", "message": "Use POST"}, 405
+        else:
+            data = await _read_json(receive)
+            with request_trace() as trace:
+                body, status = await handler(data)
+            if data and data.get("includeTimings"):
+                body = {**body, "timings": trace.summary()}
+        await _send(send, status, json.dumps(body).encode(), b"application/json", cors)
+    HTTP_SECONDS.observe(time.monotonic() - started, endpoint=endpoint, method=method, status=status)
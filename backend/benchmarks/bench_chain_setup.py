@@ -0,0 +1,55 @@
+"""Per-request LLM setup overhead: building a fresh ChatGroq + prompt + parser
+(what every request used to do) versus fetching the process-wide clients and
+compiled chains from app.get_chain(). No network calls are made.
+
+    cd backend && python benchmarks/bench_chain_setup.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder-key")
+
+import app  # noqa: E402
+from langchain_groq import ChatGroq  # noqa: E402
+from langchain_core.output_parsers import JsonOutputParser  # noqa: E402
+from langchain_core.prompts import PromptTemplate  # noqa: E402
+
+ITERATIONS = 200
+
+
+def build_per_request():
+    llm = ChatGroq(model=app.GROQ_MODEL, temperature=0.3)
+    parser = JsonOutputParser(pydantic_object=app.Summary)
+    prompt = PromptTemplate(
+        template=app.MAP_PROMPT.template,
+        input_variables=["input_text"],
+        partial_variables={"format_instructions": parser.get_format_instructions()},
+    )
+    return prompt | llm | parser
+
+
+def build_shared():
+    return app.get_chain("map")
+
+
+def time_it(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+if __name__ == "__main__":
+    build_shared()  # first use pays the one-off construction cost
+    per_request_ms = time_it(build_per_request)
+    shared_ms = time_it(build_shared)
+    print(json.dumps({
+        "benchmark": "chain_setup",
+        "iterations": ITERATIONS,
+        "perRequestMs": round(per_request_ms, 4),
+        "sharedMs": round(shared_ms, 4),
+        "speedup": round(per_request_ms / shared_ms, 1) if shared_ms else None,
+    }))
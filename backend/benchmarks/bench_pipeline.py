@@ -0,0 +1,205 @@
+"""Offline end-to-end benchmark for the LLM-bound paths in app.py.
+
+Swaps every ChatGroq for benchmarks.fake_groq.FakeGroq, then replays
+transcripts through summarize_video_pipeline, summarize_transcript_stream (fed
+caption-sized segments, as a fresh fetch would be), /answer-question and
+/detect-fake-news, plus summarize_longform_stream for any --longform-sizes
+(multi-million-character inputs, to check memory stays flat), and prints one JSON document with latency percentiles,
+LLM call counts, tokens sent and peak memory per scenario. Transcripts are
+either the .txt files in --transcripts (recorded captions) or deterministic
+synthetic ones of the requested --sizes. Caches live in a throwaway
+directory, and each repeat uses a different transcript unless
+--reuse-transcripts is given, so cold-path numbers aren't flattered by cache
+hits.
+
+    cd backend && python benchmarks/bench_pipeline.py --sizes 1000 30000 300000 --output bench.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("BRIEFLENS_CACHE_DIR", tempfile.mkdtemp(prefix="brieflens-bench-"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder-key")
+
+import app  # noqa: E402
+from fake_groq import FakeGroq  # noqa: E402
+
+_WORDS = (
+    "government minister announced budget election policy economy market "
+    "growth inflation report said people country city police court case "
+    "official statement week year percent million billion team match player "
+    "season record company shares investors technology climate energy water "
+    "health hospital school students education research scientists data"
+).split()
+
+
+def synthetic_transcript(chars, seed, punctuated=True):
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < chars:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20)))
+        sentence = sentence.capitalize() + "." if punctuated else sentence
+        parts.append(sentence)
+        total += len(sentence) + 1
+    return " ".join(parts)[:chars]
+
+
+def load_transcripts(directory):
+    transcripts = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                transcripts.append((name, f.read()))
+    return transcripts
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))], 2)
+    return {
+        "p50": pick(50),
+        "p90": pick(90),
+        "p99": pick(99),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def caption_stream(text, segment_chars=80):
+    segments = (text[i:i + segment_chars] for i in range(0, len(text), segment_chars))
+    return app.TranscriptStream(segments, "en", "benchmark", total_chars=len(text))
+
+
+def run_scenario(name, chars, fake, inputs, fn):
+    latencies = []
+    fake.reset_stats()
+    tracemalloc.start()
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = fake.stats
+    return {
+        "scenario": name,
+        "chars": chars,
+        "runs": len(inputs),
+        "latencyMs": percentiles(latencies),
+        "llmCalls": stats["calls"],
+        "llmCallsPerRun": round(stats["calls"] / len(inputs), 2),
+        "llmFailuresInjected": stats["failures"],
+        "rateLimitsInjected": stats["rateLimited"],
+        "tokensSent": stats["tokensSent"],
+        "tokensReceived": stats["tokensReceived"],
+        "peakTracedMemoryMB": round(peak / 2 ** 20, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000])
+    parser.add_argument("--longform-sizes", type=int, nargs="*", default=[], help="also run the disk-backed long-form pipeline at these sizes")
+    parser.add_argument("--transcripts", help="directory of recorded .txt transcripts to replay instead of --sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=250.0)
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--unpunctuated", action="store_true", help="synthetic transcripts without sentence punctuation, like auto-captions")
+    parser.add_argument("--reuse-transcripts", action="store_true", help="replay the same transcript each repeat (measures the warm-cache path)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    fake = FakeGroq(
+        base_latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        failure_rate=args.failure_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    app.get_llm = lambda temperature: fake
+    app._compiled_chains.clear()
+    client = app.app.test_client()
+
+    if args.transcripts:
+        corpus = [(name, [text] * args.repeat) for name, text in load_transcripts(args.transcripts)]
+    else:
+        corpus = [
+            (size, [
+                synthetic_transcript(size, args.seed if args.reuse_transcripts else args.seed * 1000 + i, not args.unpunctuated)
+                for i in range(args.repeat)
+            ])
+            for size in args.sizes
+        ]
+
+    results = []
+    for label, texts in corpus:
+        chars = len(texts[0])
+        results.append(run_scenario("summarize_video_pipeline", chars, fake, texts, app.summarize_video_pipeline))
+        if not args.reuse_transcripts:
+            # Fresh transcripts again, so the streaming path isn't served from
+            # the chunk and summary caches the first scenario just filled.
+            streamed = [text[::-1] for text in texts]
+            results.append(run_scenario("summarize_transcript_stream", chars, fake, streamed, lambda text: app.summarize_transcript_stream(caption_stream(text))))
+
+        summaries = [text[:4000] for text in texts]
+        results.append(run_scenario("answer-question", chars, fake, summaries, lambda summary: client.post(
+            "/answer-question", json={"summary": summary, "question": "What are the main points?"}
+        )))
+        results.append(run_scenario("detect-fake-news", chars, fake, texts, lambda text: client.post(
+            "/detect-fake-news", json={"text": text}
+        )))
+        if args.transcripts:
+            for result in results[-(3 if args.reuse_transcripts else 4):]:
+                result["transcript"] = label
+
+    for size in args.longform_sizes:
+        texts = [synthetic_transcript(size, args.seed * 1000 + i, not args.unpunctuated) for i in range(args.repeat)]
+        results.append(run_scenario("summarize_longform_stream", size, fake, texts, lambda text: app.summarize_longform_stream(caption_stream(text))))
+
+    report = {
+        "benchmark": "pipeline",
+        "revision": git_revision(),
+        "config": {
+            "latencyMs": args.latency_ms,
+            "tokensPerSecond": args.tokens_per_second,
+            "failureRate": args.failure_rate,
+            "rateLimitRate": args.rate_limit_rate,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "punctuated": not args.unpunctuated,
+            "reuseTranscripts": args.reuse_transcripts,
+        },
+        "peakRssMB": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
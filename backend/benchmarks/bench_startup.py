@@ -0,0 +1,150 @@
+"""Cold-start benchmark for app.py.
+
+Imports app in fresh interpreters (the way a worker starts after scaling from
+zero) and prints one JSON document with:
+
+- the median wall time of `import app` and the process's RSS afterwards;
+- the import time of each top-level package it pulled in (from
+  python -X importtime), slowest first;
+- which of the heavy optional dependencies in LAZY_MODULES were loaded
+  (there should be none: they are imported on first use);
+- for each module in MEASURED_MODULES, its own import time and the RSS it
+  adds to a bare interpreter.
+
+With --max-import-seconds or --fail-on-eager it exits non-zero on a
+regression, so it can run in CI.
+
+    cd backend && python benchmarks/bench_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use, never by `import app`.
+LAZY_MODULES = ["yt_dlp", "langchain", "langchain_core", "langchain_groq", "langchain_text_splitters", "groq", "googlesearch", "bs4", "numpy"]
+MEASURED_MODULES = [
+    "flask", "flask_cors", "httpx", "pydantic", "tiktoken", "validators", "youtube_transcript_api",
+    "langchain_core.prompts", "langchain_text_splitters", "langchain_groq", "yt_dlp", "numpy",
+]
+
+# Runs in the child interpreter; prints wall seconds, RSS and loaded modules.
+_CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "rssMB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": sorted(name for name in {watched!r} if name in sys.modules),
+}}))
+"""
+
+
+def run_child(module, importtime=False):
+    env = {
+        **os.environ,
+        "BRIEFLENS_CACHE_DIR": os.environ.get("BRIEFLENS_CACHE_DIR") or tempfile.mkdtemp(prefix="brieflens-startup-"),
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "benchmark-placeholder-key"),
+    }
+    code = _CHILD.format(module=module, watched=LAZY_MODULES) if module else _CHILD.format(module="sys", watched=[])
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    done = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+
+def top_level_import_times(importtime_log):
+    """Cumulative import seconds per top-level package, from the
+    -X importtime log of one interpreter."""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        # The tree is indented two spaces per level; level 1 are the modules
+        # app itself imports.
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 1:
+            package = name.strip().split(".")[0]
+            totals[package] = totals.get(package, 0.0) + int(cumulative) / 1e6
+    return sorted(({"package": p, "seconds": round(s, 4)} for p, s in totals.items()), key=lambda item: -item["seconds"])
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, help="fail if the median `import app` takes longer")
+    parser.add_argument("--fail-on-eager", action="store_true", help="fail if `import app` loads any of LAZY_MODULES")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    baseline, _ = run_child(None)
+    runs = [run_child("app")[0] for _ in range(args.repeat)]
+    _, importtime_log = run_child("app", importtime=True)
+    modules = []
+    for module in MEASURED_MODULES:
+        try:
+            result, _ = run_child(module)
+        except subprocess.CalledProcessError:
+            modules.append({"module": module, "error": "import failed"})
+            continue
+        modules.append({
+            "module": module,
+            "importSeconds": round(result["seconds"], 4),
+            "addedRssMB": round(result["rssMB"] - baseline["rssMB"], 1),
+        })
+
+    eager = runs[0]["loaded"]
+    import_seconds = median(r["seconds"] for r in runs)
+    report = {
+        "benchmark": "startup",
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "app": {
+            "importSeconds": round(import_seconds, 4),
+            "importSecondsMax": round(max(r["seconds"] for r in runs), 4),
+            "rssMB": round(median(r["rssMB"] for r in runs), 1),
+            "baselineRssMB": round(baseline["rssMB"], 1),
+            "eagerlyLoaded": eager,
+            "packages": top_level_import_times(importtime_log),
+        },
+        "modules": modules,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    failures = []
+    if args.max_import_seconds is not None and import_seconds > args.max_import_seconds:
+        failures.append(f"import app took {import_seconds:.2f}s (limit {args.max_import_seconds:.2f}s)")
+    if args.fail_on_eager and eager:
+        failures.append(f"import app loaded {', '.join(eager)} eagerly")
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
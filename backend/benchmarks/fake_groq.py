@@ -0,0 +1,151 @@
+"""Deterministic local stand-in for ChatGroq, used by the offline benchmarks.
+
+FakeGroq recognises each of app.py's prompts by a marker phrase and returns a
+well-formed response of plausible size (summaries are a fixed fraction of
+their input, so the map/reduce tree shrinks the way it does with the real
+model). Latency is base_latency_ms plus output tokens / tokens_per_second,
+and failures are injected at failure_rate (generic errors) and
+rate_limit_rate (429s, which exercise llm_scheduler's backoff). Every random
+decision is derived from a hash of the seed, the prompt and how many times
+that prompt has been seen, so runs are reproducible regardless of thread
+scheduling.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from llm_scheduler import estimate_tokens
+
+SUMMARY_RATIO = 0.15
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeProviderError(Exception):
+    status_code = 500
+
+
+def _compress(text, ratio=SUMMARY_RATIO, min_words=12):
+    words = text.split()
+    if not words:
+        return ""
+    step = max(1, round(1 / ratio))
+    picked = words[::step]
+    return " ".join(picked if len(picked) >= min_words else words[:min_words])
+
+
+def _respond(prompt):
+    """Builds the response text for one of app.py's prompts."""
+    if "Identify the primary language" in prompt:
+        return "English"
+    if "Translate the following" in prompt:
+        return prompt.split("text:", 1)[-1].strip()
+    if '<chunk index="' in prompt:
+        chunks = re.findall(r'<chunk index="(\d+)">\n(.*?)\n</chunk>', prompt, re.S)
+        return json.dumps({"summaries": [{"index": int(i), "summary": _compress(body)} for i, body in chunks]})
+    if "Partial summaries:" in prompt:
+        return json.dumps({"summary": _compress(prompt.split("Partial summaries:", 1)[1], 0.5)})
+    if "formatting assistant" in prompt:
+        body = prompt.split("Human:", 1)[-1].strip()
+        return f"<h2>Summary</h2><p>{body}</p>"
+    if "Transcript passages:" in prompt:
+        return json.dumps({"answer": "Based on the transcript, " + _compress(prompt.split("Question:", 1)[1], 0.5), "citations": [1]})
+    if "Question:" in prompt:
+        return json.dumps({"answer": "Based on the content, " + _compress(prompt.split("Question:", 1)[1], 0.5)})
+    if "Text to extract claims from:" in prompt:
+        body = prompt.split("Text to extract claims from:", 1)[1].split("The output should be formatted", 1)[0]
+        sentences = [s.strip() + "." for s in body.split(".") if len(s.split()) >= 6]
+        return json.dumps({"claims": sentences[:8]})
+    if "Claim to verify:" in prompt:
+        return json.dumps({"verdict": "supported", "confidence": 0.75, "reason": "Consistent with established reporting."})
+    if "Text chunk:" in prompt:
+        return json.dumps({"summary": _compress(prompt.split("Text chunk:", 1)[1])})
+    return json.dumps({"summary": _compress(prompt)})
+
+
+class FakeGroq(BaseChatModel):
+    base_latency_ms: float = 250.0
+    tokens_per_second: float = 400.0
+    failure_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int = 0
+    sleep: bool = True
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _seen: dict = PrivateAttr(default_factory=dict)
+    _stats: dict = PrivateAttr(default_factory=lambda: {"calls": 0, "failures": 0, "rateLimited": 0, "tokensSent": 0, "tokensReceived": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _prompt_text(self, messages: List[BaseMessage]) -> str:
+        return "\n".join(f"{'Human' if m.type == 'human' else m.type.capitalize()}: {m.content}" for m in messages)
+
+    def _reply(self, messages: List[BaseMessage]):
+        """The response text for messages and how long it should take."""
+        prompt = self._prompt_text(messages)
+        digest = hashlib.sha256(f"{self.seed}\x1f{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            occurrence = self._seen.get(digest, 0)
+            self._seen[digest] = occurrence + 1
+            self._stats["calls"] += 1
+            self._stats["tokensSent"] += estimate_tokens(prompt)
+        rng = random.Random(f"{digest}:{occurrence}")
+
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self._stats["rateLimited"] += 1
+            raise FakeRateLimitError("fake 429: rate limit exceeded")
+        if roll < self.rate_limit_rate + self.failure_rate:
+            with self._lock:
+                self._stats["failures"] += 1
+            raise FakeProviderError("fake provider error")
+
+        text = _respond(prompt)
+        output_tokens = estimate_tokens(text)
+        with self._lock:
+            self._stats["tokensReceived"] += output_tokens
+        return text, (self.base_latency_ms / 1000 + output_tokens / self.tokens_per_second if self.sleep else 0)
+
+    def _call(self, messages: List[BaseMessage]) -> str:
+        text, delay = self._reply(messages)
+        time.sleep(delay)
+        return text
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._call(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text, delay = self._reply(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self._call(messages).split(" ")
+        for i in range(0, len(words), 4):
+            piece = " ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "")
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
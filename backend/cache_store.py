@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# All on-disk caches live side by side in one directory so a deploy can wipe
+# (or mount a persistent volume over) a single path.
+CACHE_DIR = os.environ.get("BRIEFLENS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+
+def content_key(*parts):
+    """Stable sha256 hex digest over an ordered list of key parts. Parts are
+    joined with a unit separator so ("ab", "c") and ("a", "bc") don't
+    collide."""
+    h = hashlib.sha256()
+    for i, part in enumerate(parts):
+        if i:
+            h.update(b"\x1f")
+        h.update(str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+class SqliteCache:
+    """Persistent, size-bounded key/value store backed by one SQLite file.
+    Values are JSON-serialised. Every entry carries its own expiry (so the
+    same table can hold long-lived positive results next to short-lived
+    negative ones), and once the table grows past max_entries the least
+    recently read entries are evicted. Safe to share across the threads of a
+    Flask worker; separate worker processes share the file through WAL mode."""
+
+    def __init__(self, name, max_entries=5000, ttl_seconds=7 * 24 * 3600):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.name = name
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl_seconds=None):
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now + ttl, now),
+            )
+            self._evict(now)
+
+    def set_many(self, items, ttl_seconds=None):
+        """set() for each (key, value) pair, in one transaction."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        rows = [(key, json.dumps(value, ensure_ascii=False), now + ttl, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._evict(now)
+
+    def update(self, key, fn, default=None, ttl_seconds=None):
+        """Atomic read-modify-write: stores and returns fn(value), value being
+        the live entry or default. The read and the write share one
+        transaction, so concurrent updates of a key, from any thread or
+        worker process, never lose each other's changes."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                value = fn(json.loads(row[0]) if row is not None and row[1] >= now else default)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._evict(now)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def stats(self):
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": size,
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SpillStore:
+    """Scratch SQLite file holding one long-form run's transcript and
+    intermediate summaries, so they sit on disk instead of in the worker's
+    memory. Texts are addressed by (level, index): level 0 holds the map
+    phase's chunk summaries and each reduce level the merges of the one
+    below; callers may keep their own texts at negative levels. Used from a
+    single thread; close() deletes the file."""
+
+    def __init__(self):
+        directory = os.path.join(CACHE_DIR, "spill")
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite3", dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path)
+        # Throwaway data: no journal, no fsync.
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE nodes ("
+            " level INTEGER NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " PRIMARY KEY (level, idx))"
+        )
+
+    def put_many(self, level, start, texts):
+        """Stores texts as indexes start, start + 1, ... of level."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO nodes (level, idx, text) VALUES (?, ?, ?)",
+            ((level, start + n, text) for n, text in enumerate(texts)),
+        )
+        self._conn.commit()
+
+    def get_range(self, level, start, stop):
+        rows = self._conn.execute(
+            "SELECT text FROM nodes WHERE level = ? AND idx >= ? AND idx < ? ORDER BY idx",
+            (level, start, stop),
+        )
+        return [text for (text,) in rows]
+
+    def level_size(self, level):
+        """(node count, total characters) of level."""
+        count, chars = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM nodes WHERE level = ?", (level,)
+        ).fetchone()
+        return count, chars
+
+    def close(self):
+        self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
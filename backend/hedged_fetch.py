@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import run_in_context
+
+# Weight of the newest fetch in a source's running success rate and latency.
+STATS_SMOOTHING = 0.2
+# A source that keeps failing is ranked as if it succeeded this often, so its
+# expected time grows large but stays finite and it is still tried last.
+MIN_SUCCESS_RATE = 0.05
+
+
+class AllSourcesFailed(Exception):
+    """Raised by HedgedFetcher.fetch when every source failed; errors maps
+    each source name to the exception it raised."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+        self.errors = errors
+
+
+class SourceStats:
+    """Exponentially weighted success rate and latency of one source's recent
+    fetches, starting from a prior latency and a clean record."""
+
+    def __init__(self, name, prior_seconds):
+        self.name = name
+        self.success_rate = 1.0
+        self.latency_seconds = prior_seconds
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, ok, seconds):
+        with self._lock:
+            if ok:
+                self.successes += 1
+                self.latency_seconds += STATS_SMOOTHING * (seconds - self.latency_seconds)
+            else:
+                self.failures += 1
+            self.success_rate += STATS_SMOOTHING * ((1.0 if ok else 0.0) - self.success_rate)
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def expected_seconds(self):
+        """Expected time to a successful fetch if this source went first."""
+        with self._lock:
+            return self.latency_seconds / max(self.success_rate, MIN_SUCCESS_RATE)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "successRate": round(self.success_rate, 4),
+                "latencySeconds": round(self.latency_seconds, 3),
+                "successes": self.successes,
+                "failures": self.failures,
+                "wins": self.wins,
+            }
+
+
+class HedgedFetcher:
+    """Fetches one key from several interchangeable sources, hedged: the
+    best-ranked source starts first and the next one joins after
+    hedge_delay seconds, at once if an earlier one fails, or from the start
+    for keys that failed on some source before. The first success wins.
+    Sources are ranked by expected time to a successful fetch from their
+    recent record, so an extractor that breaks drops down the order by
+    itself. A losing fetch that hasn't started is cancelled; one already
+    running can't be interrupted, so its result is discarded (its outcome
+    still counts towards its source's stats). Exceptions in neutral_errors
+    are answers about the key (say, "this video has no captions") rather
+    than faults of the source, and don't count against it."""
+
+    def __init__(self, sources, hedge_delay, neutral_errors=(), max_workers=16, max_failed_keys=10000):
+        # sources: (name, fn(key), prior_seconds), in default order.
+        self.sources = [(name, fn) for name, fn, _ in sources]
+        self.neutral_errors = tuple(neutral_errors)
+        self.source_stats = {name: SourceStats(name, prior) for name, _, prior in sources}
+        self.hedge_delay = hedge_delay
+        self.max_failed_keys = max_failed_keys
+        self._failed_keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+
+    def ranked(self):
+        # sorted() is stable, so equally good sources keep the default order.
+        return sorted(self.sources, key=lambda source: self.source_stats[source[0]].expected_seconds())
+
+    def _failed_before(self, key):
+        with self._lock:
+            return key in self._failed_keys
+
+    def _mark_failed(self, key):
+        with self._lock:
+            self._failed_keys[key] = True
+            self._failed_keys.move_to_end(key)
+            while len(self._failed_keys) > self.max_failed_keys:
+                self._failed_keys.popitem(last=False)
+
+    def _launch(self, name, fn, key, pending):
+        started = time.monotonic()
+        future = run_in_context(self._executor, fn, key)
+
+        def done(f):
+            if not f.cancelled() and not isinstance(f.exception(), self.neutral_errors):
+                self.source_stats[name].record(f.exception() is None, time.monotonic() - started)
+        future.add_done_callback(done)
+        pending[future] = name
+
+    def fetch(self, key):
+        """Returns (source_name, result) from the first source to succeed, or
+        raises AllSourcesFailed."""
+        queued = self.ranked()
+        delay = 0 if self._failed_before(key) else self.hedge_delay
+        pending = {}
+        errors = {}
+        name, fn = queued.pop(0)
+        self._launch(name, fn, key, pending)
+        while pending:
+            done, _ = wait(pending, timeout=delay if queued else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    if errors:
+                        self._mark_failed(key)
+                    self.source_stats[name].record_win()
+                    return name, future.result()
+                errors[name] = future.exception()
+            # Either the delay ran out or a source failed, which is no reason
+            # to wait before trying the next one.
+            if queued:
+                name, fn = queued.pop(0)
+                self._launch(name, fn, key, pending)
+        self._mark_failed(key)
+        raise AllSourcesFailed(errors)
+
+    def stats(self):
+        return {
+            "order": [name for name, _ in self.ranked()],
+            "hedgeDelaySeconds": self.hedge_delay,
+            "sources": {name: stats.stats() for name, stats in self.source_stats.items()},
+        }
@@ -0,0 +1,75 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when max_pending jobs are already waiting."""
+
+
+class JobManager:
+    """Runs long summarization work on a small, fixed pool of background
+    threads so the Flask worker that accepted the request is freed right away.
+    Each job function is called as fn(progress) and must return a
+    (response_body, http_status) tuple; progress(stage, **fields) merges the
+    given fields into the job's pollable status. Finished jobs are kept for
+    ttl_seconds and then forgotten."""
+
+    def __init__(self, max_workers=4, max_pending=100, ttl_seconds=3600):
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, kind):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            pending = sum(1 for job in self._jobs.values() if job["state"] == "queued")
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs are already queued")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "jobId": job_id,
+                "kind": kind,
+                "state": "queued",
+                "stage": None,
+                "createdAt": now,
+                "updatedAt": now,
+            }
+        self._executor.submit(self._run, job_id, fn)
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                job["updatedAt"] = time.time()
+
+    def _run(self, job_id, fn):
+        self._update(job_id, state="running")
+
+        def progress(stage, **fields):
+            self._update(job_id, stage=stage, **fields)
+
+        try:
+            body, http_status = fn(progress)
+            self._update(job_id, state="done" if http_status < 400 else "failed", result=body, httpStatus=http_status)
+        except Exception as e:
+            self._update(job_id, state="failed", result={"error": str(e), "status": "error"}, httpStatus=500)
+
+    def _expire(self, now):
+        stale = [
+            job_id for job_id, job in self._jobs.items()
+            if job["state"] in ("done", "failed") and now - job["updatedAt"] > self.ttl_seconds
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
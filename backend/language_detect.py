@@ -0,0 +1,198 @@
+import re
+import unicodedata
+
+# Scripts that (for the transcripts we see) belong to a single language, so
+# the writing system alone identifies it.
+SCRIPT_LANGUAGES = {
+    "HANGUL": "Korean",
+    "THAI": "Thai",
+    "GREEK": "Greek",
+    "HEBREW": "Hebrew",
+    "GEORGIAN": "Georgian",
+    "ARMENIAN": "Armenian",
+    "TAMIL": "Tamil",
+    "TELUGU": "Telugu",
+    "GUJARATI": "Gujarati",
+    "GURMUKHI": "Punjabi",
+    "KANNADA": "Kannada",
+    "MALAYALAM": "Malayalam",
+    "ORIYA": "Odia",
+    "SINHALA": "Sinhala",
+    "KHMER": "Khmer",
+    "LAO": "Lao",
+    "MYANMAR": "Burmese",
+    "ETHIOPIC": "Amharic",
+}
+
+# Scripts shared by several languages: the first entry is the usual one, the
+# rest are only chosen on a distinguishing letter or a caption hint.
+SHARED_SCRIPT_LANGUAGES = {
+    "DEVANAGARI": ("Hindi", "Marathi", "Nepali"),
+    "ARABIC": ("Arabic", "Urdu", "Persian"),
+    "CYRILLIC": ("Russian", "Ukrainian", "Bulgarian", "Serbian", "Kazakh"),
+    "BENGALI": ("Bengali", "Assamese"),
+    "CJK": ("Chinese", "Japanese"),
+}
+
+# Letters that only occur in one of a shared script's languages.
+_MARKER_LETTERS = {
+    "Japanese": {chr(c) for c in range(0x3041, 0x3100)},  # kana
+    "Ukrainian": set("іїєґ"),
+    "Russian": set("ыэё"),
+    "Urdu": set("ےٹڈڑں"),
+    "Persian": set("پچژگ"),
+    "Marathi": set("ळ"),
+}
+
+# Frequent function words per Latin-script language. A transcript's share of
+# tokens found in each list picks the language; lists deliberately avoid
+# words that are common in several of these languages.
+COMMON_WORDS = {
+    "English": "the and of to is that it you for was with on are this be have not they but what we at from there can so just about which would their will been were",
+    "Spanish": "el los las del lo es y una con pero más muy está este esta también porque hay cuando todo sus ya sobre entre hasta donde",
+    "French": "le les des du est et une pour pas qui dans sur avec sont mais nous vous ce cette ils être fait tout comme aussi très",
+    "German": "der die das und ist nicht ich sie ein eine mit auf für von dem den auch wir sich aber wie noch oder wenn nur schon",
+    "Portuguese": "o os um é ao não uma com são mais mas também você isso muito pelo pela quando então ele ela foi tem seu sua nós",
+    "Italian": "il che della non sono per gli anche questo più ma nel alla molto perché cosa siamo hanno questa",
+    "Dutch": "het een van en niet dat zijn op voor met ook maar wat zo er nog wel naar bij kan heeft deze wordt",
+    "Indonesian": "yang dan ini itu dengan untuk tidak ada dari akan kita saya juga ke karena bisa sudah atau mereka kami",
+    "Turkish": "bir ve bu için ile çok ama gibi daha olarak ben sen var yok değil kadar şey",
+    "Polish": "nie się jest że jak ale tak czy już tylko jestem może przez są będzie bardzo który",
+    "Swedish": "och att det som är på för med har inte jag av till den om ett men kan vi så",
+    "Romanian": "și este nu care să cu pentru mai din sunt dar fost acest această foarte într",
+    "Vietnamese": "và của là có không được những người cho với này một các trong đã để khi",
+}
+_COMMON_WORD_SETS = {language: set(words.split()) for language, words in COMMON_WORDS.items()}
+
+# Caption track language codes (YouTube uses ISO 639-1, a few legacy codes,
+# and regional suffixes such as "en-GB" or "zh-Hans").
+LANGUAGE_CODES = {
+    "en": "English", "es": "Spanish", "fr": "French", "de": "German", "pt": "Portuguese",
+    "it": "Italian", "nl": "Dutch", "id": "Indonesian", "in": "Indonesian", "ms": "Malay",
+    "tr": "Turkish", "pl": "Polish", "sv": "Swedish", "ro": "Romanian", "vi": "Vietnamese",
+    "hi": "Hindi", "mr": "Marathi", "ne": "Nepali", "bn": "Bengali", "as": "Assamese",
+    "ar": "Arabic", "ur": "Urdu", "fa": "Persian", "ru": "Russian", "uk": "Ukrainian",
+    "bg": "Bulgarian", "sr": "Serbian", "kk": "Kazakh", "zh": "Chinese", "ja": "Japanese",
+    "ko": "Korean", "th": "Thai", "el": "Greek", "he": "Hebrew", "iw": "Hebrew",
+    "ka": "Georgian", "hy": "Armenian", "ta": "Tamil", "te": "Telugu", "gu": "Gujarati",
+    "pa": "Punjabi", "kn": "Kannada", "ml": "Malayalam", "or": "Odia", "si": "Sinhala",
+    "km": "Khmer", "lo": "Lao", "my": "Burmese", "am": "Amharic", "fil": "Filipino",
+    "tl": "Filipino", "sw": "Swahili", "da": "Danish", "no": "Norwegian", "nb": "Norwegian",
+    "fi": "Finnish", "cs": "Czech", "sk": "Slovak", "hu": "Hungarian", "hr": "Croatian",
+}
+
+# Below this many words/letters a sample says too little to decide locally.
+MIN_WORDS = 20
+MIN_LETTERS = 40
+# Share of tokens in a language's common-word list at which word-based
+# confidence saturates. Ordinary running speech sits well above it.
+FULL_COVERAGE = 0.2
+# A shared script without a distinguishing letter or caption hint is only
+# this fraction as certain as its script share.
+SHARED_SCRIPT_PENALTY = 0.75
+# Confidence when the caption track's language agrees with the text.
+HINT_AGREEMENT_CONFIDENCE = 0.97
+# Confidence for a caption language we have no local profile for, as long
+# as the text isn't confidently some other language.
+HINT_ONLY_CONFIDENCE = 0.85
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def language_from_code(code):
+    """English name for a caption language code, or None if unknown."""
+    if not code:
+        return None
+    base = code.lower().replace("_", "-").split("-")[0]
+    return LANGUAGE_CODES.get(base)
+
+
+def _script(ch):
+    try:
+        name = unicodedata.name(ch)
+    except ValueError:
+        return None
+    script = name.split(" ", 1)[0]
+    if script in ("HIRAGANA", "KATAKANA", "CJK"):
+        return "CJK"
+    return script
+
+
+def _script_counts(text):
+    counts = {}
+    for ch in text:
+        if ch.isalpha():
+            script = _script(ch)
+            if script:
+                counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def _shared_script_language(script, text, hinted, share):
+    candidates = SHARED_SCRIPT_LANGUAGES[script]
+    if hinted in candidates:
+        return hinted, share, "caption"
+    present = set(text)
+    for language in candidates[1:]:
+        markers = _MARKER_LETTERS.get(language)
+        if markers and present & markers:
+            return language, share, "script"
+    primary = candidates[0]
+    markers = _MARKER_LETTERS.get(primary)
+    if markers and present & markers:
+        return primary, share, "script"
+    return primary, share * SHARED_SCRIPT_PENALTY, "script"
+
+
+def _word_language(text):
+    tokens = _WORD_RE.findall(text.lower())
+    if len(tokens) < MIN_WORDS:
+        return None, 0.0
+    hits = sorted(
+        ((sum(token in words for token in tokens), language) for language, words in _COMMON_WORD_SETS.items()),
+        reverse=True,
+    )
+    (best, language), (second, _) = hits[0], hits[1]
+    if not best:
+        return None, 0.0
+    coverage = best / len(tokens)
+    return language, min(1.0, coverage / FULL_COVERAGE) * (1 - second / best)
+
+
+def detect_language(text, hint=None):
+    """Identifies the language of text without an LLM call. hint is the
+    caption track's language code, when known. Returns (language_name,
+    confidence, method): language_name is an English name such as "Hindi"
+    (or None if nothing could be determined), confidence is 0-1, and method
+    is "script" (writing system), "words" (common-word profile) or "caption"
+    (decided by the hint)."""
+    hinted = language_from_code(hint)
+    counts = _script_counts(text)
+    letters = sum(counts.values())
+    if letters < MIN_LETTERS:
+        return (hinted, HINT_ONLY_CONFIDENCE, "caption") if hinted else (None, 0.0, "script")
+
+    script, script_letters = max(counts.items(), key=lambda item: item[1])
+    share = script_letters / letters
+
+    if script == "LATIN":
+        language, confidence = _word_language(text)
+        confidence *= share
+        method = "words"
+    elif script in SHARED_SCRIPT_LANGUAGES:
+        language, confidence, method = _shared_script_language(script, text, hinted, share)
+    else:
+        language, confidence, method = SCRIPT_LANGUAGES.get(script), share, "script"
+
+    if hinted is None:
+        return language, confidence, method
+    if language == hinted:
+        return language, max(confidence, HINT_AGREEMENT_CONFIDENCE), "caption"
+    # The caption label is for a language we can't profile locally (e.g.
+    # Swahili in Latin script): trust it unless the text clearly reads as
+    # something else. A confident disagreement wins over the label, which is
+    # wrong for e.g. tracks YouTube machine-translated into English.
+    if hinted not in _COMMON_WORD_SETS and not any(hinted in c for c in SHARED_SCRIPT_LANGUAGES.values()) \
+            and hinted not in SCRIPT_LANGUAGES.values() and confidence < HINT_ONLY_CONFIDENCE:
+        return hinted, HINT_ONLY_CONFIDENCE, "caption"
+    return language, confidence, method
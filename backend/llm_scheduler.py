@@ -0,0 +1,267 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import tiktoken
+
+# Lower numbers are admitted first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_PIPELINE = 1
+PRIORITY_BULK = 2
+
+# Groq doesn't publish its tokenizer; cl100k_base is close enough to budget
+# llama-family prompts against a tokens-per-minute limit. tiktoken downloads
+# the encoding on first use, so it's loaded lazily and, if that fails (e.g.
+# no outbound network), estimates fall back to ~4 characters per token.
+_encoding = None
+_encoding_lock = threading.Lock()
+CHARS_PER_TOKEN_FALLBACK = 4
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _encoding = False
+    return _encoding
+
+
+def estimate_tokens(text):
+    encoding = _get_encoding()
+    if not encoding:
+        return len(text) // CHARS_PER_TOKEN_FALLBACK + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _is_rate_limit_error(error):
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """Process-wide admission control for LLM calls. A call is admitted only
+    when fewer than max_concurrency calls are in flight and both token
+    buckets (requests per minute, tokens per minute) can cover it; waiting
+    callers are admitted strictly in (priority, arrival) order, so an
+    interactive question never queues behind a long video's map chunks.
+    A 429 from the provider pauses all admissions for the retry-after period
+    and the call is retried with exponential backoff instead of failing."""
+
+    def __init__(self, max_concurrency=16, requests_per_minute=1000, tokens_per_minute=300000, max_retries=5):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._waiters = []
+        # ticket -> (loop, asyncio.Event) for coroutines waiting in aacquire.
+        self._async_waiters = {}
+        self._seq = itertools.count()
+        self._active = 0
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+
+    def _refill(self, now):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_budget = min(self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60)
+        self._token_budget = min(self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_seconds(self, now, tokens):
+        if now < self._paused_until:
+            return self._paused_until - now
+        request_wait = max(0.0, 1 - self._request_budget) * 60 / self.requests_per_minute
+        token_wait = max(0.0, tokens - self._token_budget) * 60 / self.tokens_per_minute
+        return max(request_wait, token_wait, 0.05)
+
+    def _try_admit(self, ticket, tokens):
+        """Admits ticket if it is first in line and the call fits; otherwise
+        returns how long to wait before checking again. Hold self._cond."""
+        now = time.monotonic()
+        self._refill(now)
+        if (
+            self._waiters[0] == ticket
+            and now >= self._paused_until
+            and self._active < self.max_concurrency
+            and self._request_budget >= 1
+            and self._token_budget >= tokens
+        ):
+            heapq.heappop(self._waiters)
+            self._active += 1
+            self._request_budget -= 1
+            self._token_budget -= tokens
+            self._notify()
+            return None
+        return self._wait_seconds(now, tokens)
+
+    def _notify(self):
+        """Wakes waiting threads, and the coroutine first in line if that is
+        who is next; no other coroutine can be admitted. Hold self._cond."""
+        self._cond.notify_all()
+        if self._waiters:
+            waiter = self._async_waiters.get(self._waiters[0])
+            if waiter is not None:
+                loop, event = waiter
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:
+                    # The loop is closed; its waiters are gone with it.
+                    pass
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def acquire(self, tokens, priority=PRIORITY_PIPELINE):
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._cond:
+            ticket = self._enqueue(priority)
+            while True:
+                wait = self._try_admit(ticket, tokens)
+                if wait is None:
+                    return
+                self._cond.wait(timeout=wait)
+
+    async def _alocked(self, fn, *args):
+        """fn(*args) under self._cond, taken without blocking the event loop:
+        while a thread holds it, the coroutine yields and tries again. No
+        holder waits or does I/O with it taken, so that is brief."""
+        while not self._cond.acquire(blocking=False):
+            await asyncio.sleep(0)
+        try:
+            return fn(*args)
+        finally:
+            self._cond.release()
+
+    async def aacquire(self, tokens, priority=PRIORITY_PIPELINE):
+        """acquire() for coroutines: waits in the same queue as threads, but
+        on an event the scheduler sets when this waiter reaches the head of
+        the line or a slot frees up, rather than blocking the loop. The
+        budget refill wait is only the timeout."""
+        tokens = min(tokens, self.tokens_per_minute)
+        loop, event = asyncio.get_running_loop(), asyncio.Event()
+
+        def enqueue():
+            ticket = self._enqueue(priority)
+            self._async_waiters[ticket] = (loop, event)
+            return ticket
+
+        def try_admit():
+            wait = self._try_admit(ticket, tokens)
+            if wait is None:
+                del self._async_waiters[ticket]
+            return wait
+
+        ticket = await self._alocked(enqueue)
+        try:
+            while True:
+                event.clear()
+                wait = await self._alocked(try_admit)
+                if wait is None:
+                    return
+                try:
+                    await asyncio.wait_for(event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            # A cancelled waiter must leave the queue, or everyone behind it
+            # would wait forever; shielded so a second cancel can't stop that.
+            await asyncio.shield(self._alocked(self._leave, ticket))
+            raise
+
+    def _leave(self, ticket):
+        """Takes a waiter that gave up out of the queue. Hold self._cond."""
+        self._async_waiters.pop(ticket, None)
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._notify()
+
+    def _release_slot(self):
+        """Hold self._cond."""
+        self._active -= 1
+        self._notify()
+
+    def release(self):
+        with self._cond:
+            self._release_slot()
+
+    def _start_pause(self, seconds):
+        """Hold self._cond."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._notify()
+
+    def _pause(self, seconds):
+        with self._cond:
+            self._start_pause(seconds)
+
+    def call(self, fn, tokens, priority=PRIORITY_PIPELINE, on_retry=None):
+        """Runs fn() once admitted, retrying on provider rate limits. Any
+        other exception propagates to the caller unchanged. on_retry, if
+        given, is called before each retry."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens, priority)
+            try:
+                return fn()
+            except Exception as e:
+                if not _is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e) or min(30.0, 2 ** attempt)
+                self._pause(delay + random.uniform(0, 0.5))
+                self.retries += 1
+                if on_retry is not None:
+                    on_retry()
+            finally:
+                self.release()
+
+    async def acall(self, fn, tokens, priority=PRIORITY_PIPELINE, on_retry=None):
+        """call() for coroutines: awaits fn() once admitted, with the same
+        rate-limit retries. The scheduler's lock is never waited on."""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(tokens, priority)
+            try:
+                return await fn()
+            except Exception as e:
+                if not _is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e) or min(30.0, 2 ** attempt)
+                await self._alocked(self._start_pause, delay + random.uniform(0, 0.5))
+                self.retries += 1
+                if on_retry is not None:
+                    on_retry()
+            finally:
+                # Shielded: a cancel mustn't leak the slot.
+                await asyncio.shield(self._alocked(self._release_slot))
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "maxConcurrency": self.max_concurrency,
+                "requestsPerMinute": self.requests_per_minute,
+                "tokensPerMinute": self.tokens_per_minute,
+                "rateLimited": self.rate_limited,
+                "retries": self.retries,
+            }
@@ -0,0 +1,168 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from cache_store import CACHE_DIR
+
+# Standard Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class PassageIndex:
+    """On-disk BM25 index over the passages of many documents (transcripts),
+    each stored under its own key. Everything lives in one SQLite file, so an
+    index is built once per document and serves every later query without
+    holding the document in memory. Once more than max_documents are
+    indexed, the least recently queried ones are dropped. Each index records
+    the version (e.g. a digest) of the text it was built from, so callers
+    can tell when it's stale. Safe to share across threads."""
+
+    def __init__(self, name="passages", max_documents=2000):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " key TEXT PRIMARY KEY,"
+            " passages INTEGER NOT NULL,"
+            " avg_length REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " version TEXT NOT NULL DEFAULT '')"
+        )
+        # Files written before versions were recorded.
+        if "version" not in {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}:
+            self._conn.execute("ALTER TABLE documents ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS passages ("
+            " key TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " start_char INTEGER NOT NULL,"
+            " end_char INTEGER NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " PRIMARY KEY (key, idx))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " key TEXT NOT NULL,"
+            " term TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " tf INTEGER NOT NULL,"
+            " PRIMARY KEY (key, term, idx))"
+        )
+
+    def has(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM documents WHERE key = ?", (key,)).fetchone() is not None
+
+    def version(self, key):
+        """The version key's index was built with, or None when key isn't
+        indexed."""
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM documents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def build(self, key, passages, version=""):
+        """Indexes passages, a list of (start_char, end_char, text), under
+        key, replacing any earlier index for it."""
+        rows, postings, total_length = [], [], 0
+        for idx, (start, end, text) in enumerate(passages):
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            total_length += length
+            rows.append((key, idx, start, end, length, text))
+            postings.extend((key, term, idx, tf) for term, tf in counts.items())
+        avg_length = total_length / len(rows) if rows else 0.0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete(key)
+                self._conn.executemany("INSERT INTO passages VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+                self._conn.execute(
+                    "INSERT INTO documents (key, passages, avg_length, accessed_at, version) VALUES (?, ?, ?, ?, ?)",
+                    (key, len(rows), avg_length, time.time(), version),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def search(self, key, query, k):
+        """The k passages of key's document that score highest for query,
+        best first, as dicts with "index", "startChar", "endChar", "text" and
+        "score". Passages sharing no term with the query are never returned."""
+        terms = sorted(set(tokenize(query)))
+        with self._lock:
+            document = self._conn.execute(
+                "SELECT passages, avg_length FROM documents WHERE key = ?", (key,)
+            ).fetchone()
+            if document is None or not terms:
+                return []
+            self._conn.execute("UPDATE documents SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            placeholders = ",".join("?" * len(terms))
+            postings = self._conn.execute(
+                f"SELECT term, idx, tf FROM postings WHERE key = ? AND term IN ({placeholders})", (key, *terms)
+            ).fetchall()
+            lengths = dict(self._conn.execute("SELECT idx, length FROM passages WHERE key = ?", (key,)))
+        count, avg_length = document
+        by_term = {}
+        for term, idx, tf in postings:
+            by_term.setdefault(term, []).append((idx, tf))
+        scores = {}
+        for term, matches in by_term.items():
+            idf = math.log(1 + (count - len(matches) + 0.5) / (len(matches) + 0.5))
+            for idx, tf in matches:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[idx] / (avg_length or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        if not best:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(best))
+            texts = {
+                idx: (start, end, text)
+                for idx, start, end, text in self._conn.execute(
+                    f"SELECT idx, start_char, end_char, text FROM passages WHERE key = ? AND idx IN ({placeholders})",
+                    (key, *(idx for idx, _ in best)),
+                )
+            }
+        return [
+            {"index": idx, "startChar": texts[idx][0], "endChar": texts[idx][1], "text": texts[idx][2], "score": round(score, 4)}
+            for idx, score in best
+        ]
+
+    def _delete(self, key):
+        for table in ("documents", "passages", "postings"):
+            self._conn.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        overflow = count - self.max_documents
+        if overflow > 0:
+            for (key,) in self._conn.execute(
+                "SELECT key FROM documents ORDER BY accessed_at ASC LIMIT ?", (overflow,)
+            ).fetchall():
+                self._delete(key)
+
+    def stats(self):
+        with self._lock:
+            (documents,) = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+            (passages,) = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()
+        return {"documents": documents, "maxDocuments": self.max_documents, "passages": passages}
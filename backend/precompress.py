@@ -0,0 +1,286 @@
+import math
+import re
+import string
+
+# Local, CPU-only shrinking of a caption transcript before any of it is sent
+# to the LLM. Cleaning drops what auto-generated captions pad the text with:
+# [Music]-style annotations, filler words, repeated phrases ("you know you
+# know") and the lines rolling captions repeat from one segment to the next. Extraction
+# then ranks sentences with TextRank over TF-IDF vectors and keeps the best
+# ones, in their original order, until the text fits its target.
+#
+# Bump when cleaning or extraction changes, so summaries cached from the old
+# output aren't served for the new one.
+PRECOMPRESS_VERSION = 2
+
+# The quality/compression knob: the share of the cleaned text extraction
+# must keep, whatever the budget asks for. None skips the whole stage;
+# 1.0 only cleans.
+PRECOMPRESS_LEVELS = {
+    "off": None,
+    "clean": 1.0,
+    "balanced": 0.5,
+    "aggressive": 0.2,
+}
+
+# The sound and speaker annotations caption tracks insert; other bracketed
+# text is left alone.
+_ANNOTATION_RE = re.compile(
+    r"\[\s*(?:music|applause|laughter|laughs|laughing|cheering|cheers|inaudible|silence|noise|foreign|crosstalk|blank_audio|_+)\s*\]"
+    r"|\(music\)|[♪♫]+|>>",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"(\s*)(\S+)")
+
+# Single-token fillers, per language. Only languages whose fillers aren't
+# also real words are listed ("um" is the Portuguese for "a").
+FILLERS = {
+    "English": frozenset("um umm ummm uh uhh uhm erm hmm hm mhm mm".split()),
+}
+
+# A run of at least MIN_REPEAT_WORDS words repeated straight after itself is
+# dropped; rolling captions repeat a whole caption line, so runs up to
+# MAX_REPEAT_WORDS words are checked. Single repeated words are left alone:
+# "that that" and "had had" are ordinary English.
+MIN_REPEAT_WORDS = 2
+MAX_REPEAT_WORDS = 40
+
+_STRIP = string.punctuation + "“”‘’…"
+
+
+def _normalize(word):
+    return word.lower().strip(_STRIP)
+
+
+class CaptionCleaner:
+    """Removes caption annotations, fillers and repeated runs of words from
+    text fed to it piece by piece (whole transcripts or caption segments as
+    they arrive). feed() returns the cleaned text it is sure of; up to
+    MAX_REPEAT_WORDS words are held back to compare with what comes next,
+    and finish() returns them. The pieces concatenate to the cleaned text:
+    each kept word keeps the whitespace before it, and a dropped word's line
+    breaks move to the next kept one, so paragraphs survive. removed counts
+    the characters each kind of cleaning dropped."""
+
+    def __init__(self, language=None):
+        self.fillers = FILLERS.get(language, frozenset())
+        # (whitespace before, word) pairs not yet emitted.
+        self.pending = []
+        self.pending_norm = []
+        self.recent_norm = []
+        # Whitespace at the end of the last piece fed, and the line breaks
+        # of dropped words, both owed to the next kept word.
+        self.trailing = ""
+        self.dropped_breaks = ""
+        self.removed = {"annotations": 0, "fillers": 0, "duplicates": 0}
+
+    def snapshot(self):
+        """JSON-serializable state, for restore() to pick up where this
+        cleaner stopped."""
+        return {
+            "pending": [list(pair) for pair in self.pending],
+            "recent": list(self.recent_norm),
+            "trailing": self.trailing,
+            "droppedBreaks": self.dropped_breaks,
+            "removed": dict(self.removed),
+        }
+
+    @classmethod
+    def restore(cls, snapshot, language=None):
+        cleaner = cls(language)
+        cleaner.pending = [tuple(pair) for pair in snapshot["pending"]]
+        cleaner.pending_norm = [_normalize(word) for _, word in cleaner.pending]
+        cleaner.recent_norm = list(snapshot["recent"])
+        cleaner.trailing = snapshot["trailing"]
+        cleaner.dropped_breaks = snapshot["droppedBreaks"]
+        cleaner.removed = dict(snapshot["removed"])
+        return cleaner
+
+    def feed(self, text):
+        stripped = _ANNOTATION_RE.sub(" ", text)
+        self.removed["annotations"] += len(text) - len(stripped)
+        stripped = self.trailing + stripped
+        words = _WORD_RE.findall(stripped)
+        self.trailing = stripped[len(stripped.rstrip()):] if words else stripped
+        self.pending.extend(words)
+        self.pending_norm.extend(_normalize(word) for _, word in words)
+        return self._emit(MAX_REPEAT_WORDS)
+
+    def finish(self):
+        self.trailing = ""
+        return self._emit(0)
+
+    def _drop(self, start, count, kind):
+        for space, word in self.pending[start:start + count]:
+            self.removed[kind] += len(space) + len(word)
+            if space.count("\n") > self.dropped_breaks.count("\n"):
+                self.dropped_breaks = space
+
+    def _emit(self, hold_back):
+        out = []
+        start = 0
+        pending, norms, recent = self.pending, self.pending_norm, self.recent_norm
+        while len(pending) - start > hold_back:
+            norm = norms[start]
+            if norm in self.fillers:
+                self._drop(start, 1, "fillers")
+                start += 1
+                continue
+            repeat = self._repeat_length(start)
+            if repeat:
+                self._drop(start, repeat, "duplicates")
+                start += repeat
+                continue
+            space, word = pending[start]
+            if self.dropped_breaks.count("\n") > space.count("\n"):
+                space = self.dropped_breaks
+            self.dropped_breaks = ""
+            out.append(space + word)
+            recent.append(norm)
+            start += 1
+        del pending[:start], norms[:start]
+        if len(recent) > 2 * MAX_REPEAT_WORDS:
+            del recent[:-MAX_REPEAT_WORDS]
+        return "".join(out)
+
+    def _repeat_length(self, start):
+        """Length of the longest run starting at pending[start] that repeats
+        the words just emitted, or 0."""
+        norms, recent = self.pending_norm, self.recent_norm
+        longest = min(MAX_REPEAT_WORDS, len(recent), len(norms) - start)
+        first = norms[start]
+        for length in range(longest, MIN_REPEAT_WORDS - 1, -1):
+            if recent[-length] == first and recent[-length:] == norms[start:start + length]:
+                return length
+        return 0
+
+
+def clean_transcript(text, language=None):
+    """CaptionCleaner over a whole text. Returns (cleaned_text, removed)."""
+    cleaner = CaptionCleaner(language)
+    cleaned = (cleaner.feed(text) + cleaner.finish()).strip()
+    return cleaned, cleaner.removed
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।。？！])\s+")
+_TOKEN_RE = re.compile(r"\w+")
+# Unpunctuated captions come out as one huge "sentence"; they are cut into
+# windows of this many words instead.
+MAX_SENTENCE_CHARS = 600
+WINDOW_WORDS = 25
+
+
+def split_sentences(text):
+    sentences = [s for s in _SENTENCE_RE.split(text) if s.strip()]
+    if sentences and sum(map(len, sentences)) / len(sentences) <= MAX_SENTENCE_CHARS:
+        return sentences
+    words = text.split()
+    return [" ".join(words[i:i + WINDOW_WORDS]) for i in range(0, len(words), WINDOW_WORDS)]
+
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+
+
+def textrank_scores(sentences):
+    """TextRank centrality of each sentence over the cosine-similarity graph
+    of their TF-IDF vectors. The vectors are kept sparse and the similarity
+    matrix is never built: each power-iteration step multiplies by X and
+    X.T separately, so time and memory grow with the text, not its square."""
+    import numpy as np
+
+    vocabulary = {}
+    rows, cols, counts = [], [], []
+    for i, sentence in enumerate(sentences):
+        terms = {}
+        for token in _TOKEN_RE.findall(sentence.lower()):
+            index = vocabulary.setdefault(token, len(vocabulary))
+            terms[index] = terms.get(index, 0) + 1
+        for index, count in terms.items():
+            rows.append(i)
+            cols.append(index)
+            counts.append(count)
+    n = len(sentences)
+    if not counts:
+        return np.zeros(n)
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    values = (1 + np.log(np.asarray(counts, dtype=float))) * np.log((1 + n) / (1 + document_frequency[cols]))
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n))
+    values = values / np.where(norms > 0, norms, 1)[rows]
+
+    def similarity_times(v):
+        # (X @ X.T - I) @ v for the unit-length rows; empty rows stay 0.
+        projected = np.bincount(cols, weights=values * v[rows], minlength=len(vocabulary))
+        return np.bincount(rows, weights=values * projected[cols], minlength=n) - np.where(norms > 0, v, 0)
+
+    degree = similarity_times(np.ones(n))
+    connected = degree > 1e-12
+    scores = np.full(n, 1.0 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        spread = np.where(connected, scores / np.where(connected, degree, 1), 0)
+        scores = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * similarity_times(spread)
+    return scores
+
+
+# Sentences are chosen per stretch of about SECTION_CHARS of the transcript,
+# each keeping its proportional share of the target, so the kept text covers
+# the whole video instead of the stretch that happens to rank best.
+SECTION_CHARS = 20000
+
+
+def extract_sentences(text, target_chars):
+    """Keeps the best-ranked sentences of text, in order, until about
+    target_chars remain. Returns (text, sentences_kept, sentences_total)."""
+    sentences = split_sentences(text)
+    if len(text) <= target_chars or len(sentences) < 2:
+        return text, len(sentences), len(sentences)
+    scores = textrank_scores(sentences)
+    ratio = target_chars / len(text)
+    keep = []
+    section, section_chars = [], 0
+    for i, sentence in enumerate(sentences):
+        section.append(i)
+        section_chars += len(sentence) + 1
+        if section_chars >= SECTION_CHARS or i == len(sentences) - 1:
+            quota, kept_chars = section_chars * ratio, 0
+            for j in sorted(section, key=lambda j: -scores[j]):
+                if kept_chars >= quota:
+                    break
+                keep.append(j)
+                kept_chars += len(sentences[j]) + 1
+            section, section_chars = [], 0
+    keep.sort()
+    return " ".join(sentences[j] for j in keep), len(keep), len(sentences)
+
+
+def build_report(level, original_chars, kept_chars, removed, extraction_chars=0, sentences_kept=None, sentences_total=None):
+    """The report precompress() returns, for callers that clean text
+    incrementally with a CaptionCleaner."""
+    return {
+        "level": level,
+        "originalChars": original_chars,
+        "keptChars": kept_chars,
+        "charsRemoved": max(0, original_chars - kept_chars),
+        "removed": {**removed, "extraction": extraction_chars},
+        "sentencesKept": sentences_kept,
+        "sentencesTotal": sentences_total,
+    }
+
+
+def precompress(text, language=None, level="clean", budget_chars=60000):
+    """Cleans text and, when it is still over budget_chars, extracts it down
+    to the budget, but never below the share of it that level keeps.
+    Returns (text, report), the report giving the characters each step
+    removed."""
+    keep_ratio = PRECOMPRESS_LEVELS[level]
+    if keep_ratio is None:
+        return text, None
+    cleaned, removed = clean_transcript(text, language)
+    sentences_total = sentences_kept = None
+    extracted = cleaned
+    target = max(budget_chars, math.ceil(len(cleaned) * keep_ratio))
+    if len(cleaned) > target:
+        extracted, sentences_kept, sentences_total = extract_sentences(cleaned, target)
+    report = build_report(level, len(text), len(extracted), removed, len(cleaned) - len(extracted), sentences_kept, sentences_total)
+    return extracted, report
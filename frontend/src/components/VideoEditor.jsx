@@ -16,6 +16,7 @@ const VideoEditor = ({ videoUrl, setVideoUrl }) => {
   const [analysisError, setAnalysisError] = useState(null);
   const [question, setQuestion] = useState("");
   const [qaHistory, setQaHistory] = useState([]);
+  const [qaSessionId, setQaSessionId] = useState(null);
   const [isQaSessionActive, setIsQaSessionActive] = useState(false);
   const [isCheckingFakeNews, setIsCheckingFakeNews] = useState(false);
   const [fakeNewsAnalysis, setFakeNewsAnalysis] = useState(null);
@@ -37,6 +38,7 @@ const VideoEditor = ({ videoUrl, setVideoUrl }) => {
     setAnalysisError(null);
     setFakeNewsAnalysis(null);
     setQaHistory([]);
+    setQaSessionId(null);
     setIsQaSessionActive(false);
 
     setIsAnalyzing(true);
@@ -141,18 +143,33 @@ const VideoEditor = ({ videoUrl, setVideoUrl }) => {
 
     try {
       const token = localStorage.getItem("token");
-      const response = await axios.post(
+      // Follow-ups only send the question; the server keeps the session's
+      // summary and history. An expired session is restarted from scratch.
+      const ask = (sessionId) => axios.post(
         `${FLASK_BASE_URL}/answer-question`,
-        {
-          summary: summary,
-          question: question.trim()
-        },
+        sessionId
+          ? { sessionId: sessionId, question: question.trim() }
+          : {
+              summary: summary,
+              videoUrl: videoUrl,
+              question: question.trim()
+            },
         {
           headers: {
             token: token,
           },
         }
       );
+      let response;
+      try {
+        response = await ask(qaSessionId);
+      } catch (error) {
+        if (!qaSessionId || error.response?.data?.error !== "session_expired") {
+          throw error;
+        }
+        response = await ask(null);
+      }
+      setQaSessionId(response.data.sessionId);
 
       if (response.data && response.data.answer) {
         setQaHistory([...qaHistory, {